@@ -1,12 +1,179 @@
 import re
 import logging
 import asyncio
-from typing import Dict, List, Any, Optional
-from urllib.parse import urlparse
+import time
+from collections import OrderedDict, defaultdict
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple
+from urllib.parse import urlparse, quote_plus
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Precompiled patterns used on every product title
+_PRICE_RE = re.compile(r'\$?([\d,]+\.?\d*)')
+_SIZE_RE = re.compile(r'(\d+(\.\d+)?)\s*(inch|"|in\b)')
+_COLOR_RE = re.compile(r'\b(black|white|blue|red|green|yellow|gray|grey|silver|gold|rose gold|purple|pink)\b')
+_SHOE_SIZE_RE = re.compile(r'size\s*(\d+(\.\d+)?)')
+_CPU_RE = re.compile(r'\b(i3|i5|i7|i9|ryzen|core)\b')
+_RAM_RE = re.compile(r'(\d+)\s*gb\s*(ram|memory)')
+_STORAGE_RE = re.compile(r'(\d+)\s*(gb|tb)\s*(ssd|hdd|storage)')
+_PHONE_STORAGE_RE = re.compile(r'(\d+)\s*(gb|tb)')
+_GEN_RE = re.compile(r'((\d+)(nd|rd|th)?\s*gen)')
+_MODEL_RES = (
+    re.compile(r'(\b[A-Z0-9]+-[A-Z0-9]+\b)'),  # Matches patterns like "X-T30"
+    re.compile(r'(\b[A-Z][0-9]{1,4}\b)'),      # Matches patterns like "A7" or "X100"
+    re.compile(r'(\b[A-Z]{1,3}[0-9]{2,4}\b)'),  # Matches patterns like "EOS80D" or "A7III"
+)
+
+# Category keywords in priority order - the first category with any keyword wins
+_CATEGORY_KEYWORDS = (
+    ("shoes", ('shoe', 'sneaker', 'trainer', 'boot', 'footwear')),
+    ("computers", ('laptop', 'computer', 'pc', 'desktop', 'macbook', 'chromebook')),
+    ("phones", ('phone', 'iphone', 'smartphone', 'android', 'galaxy', 'pixel')),
+    ("tvs", ('tv', 'television', 'smart tv', 'led tv', 'oled', 'qled')),
+    ("audio", ('headphone', 'earphone', 'earbud', 'airpod', 'speaker', 'soundbar')),
+    ("appliances", ('refrigerator', 'washer', 'dryer', 'dishwasher', 'microwave', 'oven', 'vacuum')),
+    ("gaming", ('xbox', 'playstation', 'ps5', 'ps4', 'nintendo', 'switch', 'gaming', 'console')),
+    ("home", ('furniture', 'chair', 'table', 'desk', 'mattress', 'bed', 'sofa', 'couch')),
+)
+_CATEGORY_PRIORITY = {category: index for index, (category, _) in enumerate(_CATEGORY_KEYWORDS)}
+
+
+def _essential_keywords(words: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Drop keywords that contain another keyword of the same category (e.g. "smart tv" -> "tv")."""
+    return tuple(word for word in words if not any(other != word and other in word for other in words))
+
+
+# Single pass over title + url: the lookahead reports a match at every position so keywords
+# nested inside a longer one (e.g. "phone" in "headphone") are still seen, and at any given
+# position the higher-priority category is tried first
+_CATEGORY_RE = re.compile(
+    "(?=" + "|".join(
+        f"(?P<{category}>" + "|".join(re.escape(word) for word in _essential_keywords(words)) + ")"
+        for category, words in _CATEGORY_KEYWORDS
+    ) + ")"
+)
+
+# Successful market searches are reused for identical queries within this window
+_SEARCH_CACHE_TTL = 300.0  # seconds
+_SEARCH_CACHE_MAXSIZE = 512
+
+# In-flight searches allowed per market, to stay under the sites' anti-bot throttling
+_MAX_SEARCHES_PER_MARKET = 2
+
+# Market -> (display name, search URL template, scraper search method name)
+_MARKET_SEARCH = {
+    "amazon": ("Amazon", "https://www.amazon.com/s?k={}", "_get_amazon_search_result"),
+    # Target search not fully implemented
+    "target": ("Target", "https://www.target.com/s?searchTerm={}", None),
+    "bestbuy": ("Best Buy", "https://www.bestbuy.com/site/searchpage.jsp?st={}", "_get_bestbuy_search_result"),
+}
+
+# Markets searched for alternatives, and the subset to search for each product source
+_AVAILABLE_MARKETS = ("amazon", "target", "bestbuy")
+_TARGET_MARKETS_BY_SOURCE = {
+    source: tuple(market for market in _AVAILABLE_MARKETS if market != source)
+    for source in _AVAILABLE_MARKETS
+}
+
+
+@lru_cache(maxsize=4096)
+def _category_of(title_lower: str, url_lower: str) -> str:
+    """Identify the product category from the lowercased title and URL."""
+    best = None
+    for match in _CATEGORY_RE.finditer(f"{title_lower}\n{url_lower}"):
+        priority = _CATEGORY_PRIORITY[match.lastgroup]
+        if best is None or priority < best:
+            best = priority
+            if best == 0:
+                break
+
+    # Default to general if no specific category is detected
+    return _CATEGORY_KEYWORDS[best][0] if best is not None else "general"
+
+
+@lru_cache(maxsize=4096)
+def _attributes_of(title_lower: str, category: str) -> Tuple[str, ...]:
+    """Extract key product attributes from the lowercased title (as a tuple so it can be cached)."""
+    attributes = []
+
+    # Extract size information
+    size_match = _SIZE_RE.search(title_lower)
+    if size_match:
+        attributes.append(f"{size_match.group(1)} inch")
+
+    # Extract color information
+    color_match = _COLOR_RE.search(title_lower)
+    if color_match:
+        attributes.append(color_match.group(1))
+
+    # Category-specific attributes
+    if category == "shoes":
+        # Look for size
+        shoe_size_match = _SHOE_SIZE_RE.search(title_lower)
+        if shoe_size_match:
+            attributes.append(f"size {shoe_size_match.group(1)}")
+
+        # Look for gender
+        if "men" in title_lower:
+            attributes.append("men")
+        elif "women" in title_lower:
+            attributes.append("women")
+
+    elif category == "computers":
+        # Look for CPU
+        cpu_match = _CPU_RE.search(title_lower)
+        if cpu_match:
+            attributes.append(cpu_match.group(1))
+
+        # Look for RAM
+        ram_match = _RAM_RE.search(title_lower)
+        if ram_match:
+            attributes.append(f"{ram_match.group(1)}GB RAM")
+
+        # Look for storage
+        storage_match = _STORAGE_RE.search(title_lower)
+        if storage_match:
+            attributes.append(f"{storage_match.group(1)}{storage_match.group(2)} storage")
+
+    elif category == "phones":
+        # Look for storage
+        storage_match = _PHONE_STORAGE_RE.search(title_lower)
+        if storage_match:
+            attributes.append(f"{storage_match.group(1)}{storage_match.group(2)}")
+
+        # Look for generation/version
+        gen_match = _GEN_RE.search(title_lower)
+        if gen_match:
+            attributes.append(gen_match.group(1))
+
+    return tuple(attributes)
+
+
+@lru_cache(maxsize=4096)
+def _parse_title(title: str, category: str) -> Tuple[str, str, Tuple[str, ...]]:
+    """Extract (brand, model, key attributes) from a product title in one pass."""
+    # Tokenize once: the first word is often the brand, the second is the model fallback
+    # (maxsplit keeps this from tokenizing the whole title)
+    parts = title.split(None, 2)
+    brand = parts[0] if parts else ""
+
+    # Look for patterns that might be model numbers
+    model = ""
+    for pattern in _MODEL_RES:
+        match = pattern.search(title)
+        if match:
+            model = match.group(1)
+            break
+    else:
+        # If no pattern matches, use words after brand (if title has multiple words)
+        if len(parts) > 1:
+            model = parts[1]
+
+    return brand, model, _attributes_of(title.lower(), category)
+
+
 class AlternativeFinder:
     """Enhanced alternative product finder with multi-strategy search capabilities."""
     
@@ -19,6 +186,18 @@ class AlternativeFinder:
         """
         self.scraper = price_scraper
         
+        # Resolve each market's search URL template and scraper search method once
+        self._market_dispatch = {}
+        for market, (name, template, method_name) in _MARKET_SEARCH.items():
+            search = getattr(price_scraper, method_name, None) if method_name else None
+            self._market_dispatch[market] = (name, template, search)
+        
+        # Per-market limit on concurrent searches; markets don't block each other
+        self._market_semaphores = defaultdict(lambda: asyncio.Semaphore(_MAX_SEARCHES_PER_MARKET))
+        
+        # LRU of successful search results: (market, normalized query) -> (timestamp, result)
+        self._search_cache: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        
     async def find_alternatives(self, product_details: Dict[str, Any], max_results: int = 3) -> List[Dict[str, Any]]:
         """
         Find alternative products to the one provided using multiple search strategies.
@@ -30,55 +209,63 @@ class AlternativeFinder:
         Returns:
             List of alternative product details
         """
-        # CRITICAL FIX: Ensure source is properly set before finding alternatives
-        original_source = product_details.get('source', '').lower()
+        # Snapshot the fields we need once; product_details is only written back when fixed up
+        source = (product_details.get('source') or '').lower()
         url = product_details.get('url', '')
+        url_lower = url.lower()
+        title = product_details.get('title', 'Unknown Product')
+        price = product_details.get('price')
+        price_text = product_details.get('price_text')
+        if price_text == "Price not available":
+            # Placeholder from the direct Target/Best Buy scrapers - nothing to parse
+            price_text = None
         
+        # CRITICAL FIX: Ensure source is properly set before finding alternatives
         # Always fix www to amazon if url contains amazon.com
-        if original_source == 'www' and 'amazon' in url.lower():
-            logger.info(f"Fixing source from 'www' to 'amazon' for alternatives search: {url}")
-            product_details['source'] = 'amazon'
+        if source == 'www' and 'amazon' in url_lower:
+            logger.info("Fixing source from 'www' to 'amazon' for alternatives search: %s", url)
+            source = 'amazon'
+            product_details['source'] = source
         
         # Log the search attempt for better debugging
-        logger.info(f"Searching for alternatives for product from {product_details.get('source', 'unknown')} with title: {product_details.get('title', 'Unknown')}")
+        logger.info("Searching for alternatives for product from %s with title: %s", source or 'unknown', title)
         
         # FAST PATH: If we're missing critical data, don't waste time with expensive searches
         if product_details.get('status') != 'success':
-            logger.warning(f"Skipping alternatives search for unsuccessful product fetch: {product_details.get('message', 'Unknown error')}")
+            logger.warning("Skipping alternatives search for unsuccessful product fetch: %s", product_details.get('message', 'Unknown error'))
             return []
             
         # If we don't have a price, try to get it from the price_text
-        if product_details.get('price') is None and product_details.get('price_text'):
+        # (only worth running the regex if there's a digit to find)
+        if price is None and price_text and any(ch.isdigit() for ch in price_text):
             try:
-                price_text = product_details.get('price_text', '')
-                price_match = re.search(r'\$?([\d,]+\.?\d*)', price_text)
+                price_match = _PRICE_RE.search(price_text)
                 if price_match:
                     price_str = price_match.group(1).replace(',', '')
                     price = float(price_str)
                     # Add it to the product details
                     product_details['price'] = price
-                    logger.info(f"Extracted price ${price} from price_text '{price_text}' for alternatives search")
+                    logger.info("Extracted price $%s from price_text '%s' for alternatives search", price, price_text)
             except Exception as e:
-                logger.error(f"Failed to extract price from price_text: {e}")
+                logger.error("Failed to extract price from price_text: %s", e)
         
         # FAST PATH: If we still don't have a price after trying to extract it, 
         # searching for alternatives is likely to be unproductive
-        if product_details.get('price') is None:
+        if price is None:
             logger.warning("Skipping alternatives search because price is missing")
             return []
         
-        # Get product information
-        source = product_details.get('source', 'unknown').lower()
-        title = product_details.get('title', 'Unknown Product')
-        
         # Skip alternatives search if title is unusable
         if title == "Unknown Product" or len(title) < 5:
-            logger.warning(f"Cannot search for alternatives without a valid product title: {title}")
+            logger.warning("Cannot search for alternatives without a valid product title: %s", title)
             return []
-            
+        
+        # Lowercase once and share with every title helper below
+        title_lower = title.lower()
+        
         # Identify the category of the product for better search targeting
-        category = self._identify_product_category(title, url)
-        logger.info(f"Identified product category: {category}")
+        category = self._identify_product_category(title_lower, url_lower)
+        logger.info("Identified product category: %s", category)
         
         # Use multi-strategy search with multiple retries
         alternatives = []
@@ -86,216 +273,88 @@ class AlternativeFinder:
         max_errors = 3  # Maximum allowed errors before giving up
         
         # Try to search for alternatives in all available markets except the source
-        available_markets = ["amazon", "target", "bestbuy"]
-        target_markets = [market for market in available_markets if market != source]
-        
-        # First try a direct search by title for every market
-        for market in target_markets:
-            if len(alternatives) >= max_results:
-                break
-                
-            try:
-                logger.info(f"Searching for alternatives on {market} for {title}")
-                alt_result = await self._search_market_for_alternative(market, title, category, product_details)
-                
-                if alt_result and alt_result.get("status") == "success":
-                    alternatives.append(alt_result)
-                    logger.info(f"Found alternative on {market}: {alt_result.get('title', 'Unknown')}")
-            except Exception as e:
-                logger.error(f"Error searching {market}: {str(e)}")
+        target_markets = _TARGET_MARKETS_BY_SOURCE.get(source, _AVAILABLE_MARKETS)
+        
+        # First try a direct search by title on every market concurrently
+        logger.info("Searching for alternatives on %s for %s", ', '.join(target_markets), title)
+        results = await asyncio.gather(
+            *[self._search_market_for_alternative(market, title, category, product_details) for market in target_markets],
+            return_exceptions=True
+        )
+        
+        for market, alt_result in zip(target_markets, results):
+            if isinstance(alt_result, Exception):
+                logger.error("Error searching %s: %s", market, alt_result)
                 error_count += 1
-                if error_count >= max_errors:
-                    logger.warning(f"Too many errors ({error_count}), stopping alternatives search")
-                    break
+            elif alt_result and alt_result.get("status") == "success":
+                alternatives.append(alt_result)
+                logger.info("Found alternative on %s: %s", market, alt_result.get('title', 'Unknown'))
+        
+        # Only markets that came back empty are worth a second, attribute-based query
+        found_markets = {alt.get("source", "").lower() for alt in alternatives}
+        missing_markets = [market for market in target_markets if market not in found_markets]
         
         # If we don't have enough alternatives, try attribute-based search
-        if len(alternatives) < max_results:
+        if len(alternatives) < max_results and missing_markets and error_count < max_errors:
             # Extract attributes from product title
-            brand = self._extract_brand_from_title(title)
-            model = self._extract_model_from_title(title)
-            attributes = self._extract_key_attributes(title, category)
+            brand, model, attributes = self._parse_title(title, category)
             
-            logger.info(f"Extracted product attributes - Brand: {brand}, Model: {model}, Attributes: {attributes}")
+            logger.info("Extracted product attributes - Brand: %s, Model: %s, Attributes: %s", brand, model, attributes)
             
             # Generate targeted search query based on extracted attributes
             search_query = self._generate_targeted_search_query(brand, model, attributes, category)
             
             # Try remaining markets with the targeted query
-            for market in target_markets:
-                if market not in [alt.get("source", "").lower() for alt in alternatives] and len(alternatives) < max_results:
-                    try:
-                        logger.info(f"Searching {market} with targeted query: {search_query}")
-                        alt_result = await self._search_market_for_alternative(market, search_query, category, product_details)
-                        
-                        if alt_result and alt_result.get("status") == "success":
-                            alternatives.append(alt_result)
-                            logger.info(f"Found alternative on {market} with targeted query: {alt_result.get('title', 'Unknown')}")
-                    except Exception as e:
-                        logger.error(f"Error searching {market} with targeted query: {str(e)}")
-                        error_count += 1
-                        if error_count >= max_errors:
-                            break
+            logger.info("Searching %s with targeted query: %s", ', '.join(missing_markets), search_query)
+            results = await asyncio.gather(
+                *[self._search_market_for_alternative(market, search_query, category, product_details) for market in missing_markets],
+                return_exceptions=True
+            )
+            
+            for market, alt_result in zip(missing_markets, results):
+                if isinstance(alt_result, Exception):
+                    logger.error("Error searching %s with targeted query: %s", market, alt_result)
+                    error_count += 1
+                elif alt_result and alt_result.get("status") == "success":
+                    alternatives.append(alt_result)
+                    logger.info("Found alternative on %s with targeted query: %s", market, alt_result.get('title', 'Unknown'))
+        
+        if error_count >= max_errors:
+            logger.warning("Too many errors (%s) during alternatives search", error_count)
+        
+        # Only keep as many alternatives as were requested
+        alternatives = alternatives[:max_results]
         
         # Post-process alternatives to calculate if they're better deals
-        processed_alternatives = []
         for alt in alternatives:
-            if alt.get("price") is not None and product_details.get("price") is not None:
-                # Calculate price difference
-                price_diff = product_details.get("price") - alt.get("price")
-                price_diff_percent = (price_diff / product_details.get("price")) * 100 if product_details.get("price") > 0 else 0
-                
-                # Determine if it's a better deal
-                if price_diff_percent > 5:  # At least 5% cheaper
-                    alt["is_better_deal"] = True
-                    alt["reason"] = f"{abs(round(price_diff_percent))}% cheaper than original"
-                else:
-                    alt["is_better_deal"] = False
-                    if price_diff_percent < -5:  # More expensive
-                        alt["reason"] = f"{abs(round(price_diff_percent))}% more expensive than original"
-                    else:
-                        alt["reason"] = "Similar price to original"
-            else:
+            alt_price = alt.get("price")
+            if alt_price is None:
                 # Can't determine if it's a better deal without prices
                 alt["is_better_deal"] = False
                 alt["reason"] = "Cannot compare prices (missing data)"
-                
-            processed_alternatives.append(alt)
-            
-        return processed_alternatives[:max_results]
-    
-    def _identify_product_category(self, title: str, url: str) -> str:
-        """Identify the product category from the title and URL."""
-        title_lower = title.lower()
-        url_lower = url.lower()
-        
-        # Check for shoes/footwear
-        if any(word in title_lower or word in url_lower for word in 
-              ['shoe', 'sneaker', 'trainer', 'boot', 'footwear']):
-            return "shoes"
-            
-        # Check for electronics/computer
-        if any(word in title_lower or word in url_lower for word in 
-              ['laptop', 'computer', 'pc', 'desktop', 'macbook', 'chromebook']):
-            return "computers"
+                continue
             
-        # Check for phones
-        if any(word in title_lower or word in url_lower for word in 
-              ['phone', 'iphone', 'smartphone', 'android', 'galaxy', 'pixel']):
-            return "phones"
-            
-        # Check for TVs
-        if any(word in title_lower or word in url_lower for word in 
-              ['tv', 'television', 'smart tv', 'led tv', 'oled', 'qled']):
-            return "tvs"
-            
-        # Check for audio
-        if any(word in title_lower or word in url_lower for word in 
-              ['headphone', 'earphone', 'earbud', 'airpod', 'speaker', 'soundbar']):
-            return "audio"
-            
-        # Check for appliances
-        if any(word in title_lower or word in url_lower for word in 
-              ['refrigerator', 'washer', 'dryer', 'dishwasher', 'microwave', 'oven', 'vacuum']):
-            return "appliances"
-            
-        # Check for gaming
-        if any(word in title_lower or word in url_lower for word in 
-              ['xbox', 'playstation', 'ps5', 'ps4', 'nintendo', 'switch', 'gaming', 'console']):
-            return "gaming"
+            # Determine if it's a better deal
+            price_diff_percent = ((price - alt_price) / price) * 100.0 if price > 0 else 0.0
+            percent = abs(round(price_diff_percent))
+            alt["is_better_deal"] = price_diff_percent > 5  # At least 5% cheaper
+            if price_diff_percent > 5:
+                alt["reason"] = f"{percent}% cheaper than original"
+            elif price_diff_percent < -5:  # More expensive
+                alt["reason"] = f"{percent}% more expensive than original"
+            else:
+                alt["reason"] = "Similar price to original"
             
-        # Check for home goods
-        if any(word in title_lower or word in url_lower for word in 
-              ['furniture', 'chair', 'table', 'desk', 'mattress', 'bed', 'sofa', 'couch']):
-            return "home"
-        
-        # Default to general if no specific category is detected
-        return "general"
+        return alternatives
     
-    def _extract_brand_from_title(self, title: str) -> str:
-        """Extract brand name from product title."""
-        # Common approach: first word is often the brand
-        parts = title.split()
-        if len(parts) > 0:
-            return parts[0]
-        return ""
+    def _identify_product_category(self, title_lower: str, url_lower: str) -> str:
+        """Identify the product category from the lowercased title and URL."""
+        return _category_of(title_lower, url_lower)
     
-    def _extract_model_from_title(self, title: str) -> str:
-        """Extract model number or name from product title."""
-        # Look for patterns that might be model numbers
-        model_patterns = [
-            r'(\b[A-Z0-9]+-[A-Z0-9]+\b)',  # Matches patterns like "X-T30"
-            r'(\b[A-Z][0-9]{1,4}\b)',      # Matches patterns like "A7" or "X100"
-            r'(\b[A-Z]{1,3}[0-9]{2,4}\b)'  # Matches patterns like "EOS80D" or "A7III"
-        ]
-        
-        for pattern in model_patterns:
-            match = re.search(pattern, title)
-            if match:
-                return match.group(1)
-        
-        # If no pattern matches, use words after brand (if title has multiple words)
-        parts = title.split()
-        if len(parts) > 1:
-            return parts[1]
-        
-        return ""
-    
-    def _extract_key_attributes(self, title: str, category: str) -> List[str]:
-        """Extract key product attributes based on category."""
-        title_lower = title.lower()
-        attributes = []
-        
-        # Extract size information
-        size_match = re.search(r'(\d+(\.\d+)?)\s*(inch|"|in\b)', title_lower)
-        if size_match:
-            attributes.append(f"{size_match.group(1)} inch")
-        
-        # Extract color information
-        color_match = re.search(r'\b(black|white|blue|red|green|yellow|gray|grey|silver|gold|rose gold|purple|pink)\b', title_lower)
-        if color_match:
-            attributes.append(color_match.group(1))
-        
-        # Category-specific attributes
-        if category == "shoes":
-            # Look for size
-            shoe_size_match = re.search(r'size\s*(\d+(\.\d+)?)', title_lower)
-            if shoe_size_match:
-                attributes.append(f"size {shoe_size_match.group(1)}")
-                
-            # Look for gender
-            if "men" in title_lower:
-                attributes.append("men")
-            elif "women" in title_lower:
-                attributes.append("women")
-            
-        elif category == "computers":
-            # Look for CPU
-            cpu_match = re.search(r'\b(i3|i5|i7|i9|ryzen|core)\b', title_lower)
-            if cpu_match:
-                attributes.append(cpu_match.group(1))
-                
-            # Look for RAM
-            ram_match = re.search(r'(\d+)\s*gb\s*(ram|memory)', title_lower)
-            if ram_match:
-                attributes.append(f"{ram_match.group(1)}GB RAM")
-                
-            # Look for storage
-            storage_match = re.search(r'(\d+)\s*(gb|tb)\s*(ssd|hdd|storage)', title_lower)
-            if storage_match:
-                attributes.append(f"{storage_match.group(1)}{storage_match.group(2)} storage")
-        
-        elif category == "phones":
-            # Look for storage
-            storage_match = re.search(r'(\d+)\s*(gb|tb)', title_lower)
-            if storage_match:
-                attributes.append(f"{storage_match.group(1)}{storage_match.group(2)}")
-                
-            # Look for generation/version
-            gen_match = re.search(r'((\d+)(nd|rd|th)?\s*gen)', title_lower)
-            if gen_match:
-                attributes.append(gen_match.group(1))
-        
-        return attributes
+    def _parse_title(self, title: str, category: str) -> Tuple[str, str, List[str]]:
+        """Extract brand, model and key attributes (based on category) from product title."""
+        brand, model, attributes = _parse_title(title, category)
+        return brand, model, list(attributes)
     
     def _generate_targeted_search_query(self, brand: str, model: str, attributes: List[str], category: str) -> str:
         """Generate a targeted search query based on product attributes."""
@@ -333,55 +392,46 @@ class AlternativeFinder:
     
     async def _search_market_for_alternative(self, market: str, search_query: str, category: str, original_product: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Search a specific market for an alternative product."""
-        encoded_query = search_query.replace(" ", "+")
+        entry = self._market_dispatch.get(market)
+        if entry is None:
+            return {"status": "error", "message": f"Unsupported market: {market}", "source": market}
+        
+        name, template, search = entry
+        if search is None:
+            logger.warning("%s search not implemented in scraper", name)
+            return {"status": "error", "message": f"{name} search not implemented", "source": market}
+        
+        cache_key = (market, search_query.strip().lower())
+        cached = self._search_cache.get(cache_key)
+        if cached is not None:
+            timestamp, cached_result = cached
+            if time.monotonic() - timestamp < _SEARCH_CACHE_TTL:
+                self._search_cache.move_to_end(cache_key)
+                logger.info("Using cached %s search result for query: %s", name, search_query)
+                # Hand out a copy - callers annotate the result dict
+                return dict(cached_result)
+            del self._search_cache[cache_key]
+        
+        search_url = template.format(quote_plus(search_query))
         
         # Set shorter timeouts to prevent hanging
         search_timeout = 8.0  # 8 seconds max for any search request
         
-        logger.info(f"Searching for alternative on {market} with query: {search_query}")
-        
-        if market == "amazon":
-            search_url = f"https://www.amazon.com/s?k={encoded_query}"
-            try:
-                # Add timeout to prevent hanging
-                result = await asyncio.wait_for(
-                    self.scraper._get_amazon_search_result(search_url),
-                    timeout=search_timeout
-                )
-                logger.debug(f"Amazon search result status: {result.get('status', 'unknown')}")
-                return result
-            except asyncio.TimeoutError:
-                logger.warning(f"Amazon search timed out after {search_timeout}s for query: {search_query}")
-                return {"status": "error", "message": "Amazon search timed out", "source": "amazon"}
-            except Exception as e:
-                logger.error(f"Error searching Amazon: {e}")
-                return {"status": "error", "message": f"Amazon search failed: {str(e)}", "source": "amazon"}
-        
-        elif market == "target":
-            search_url = f"https://www.target.com/s?searchTerm={encoded_query}"
-            # Target search not fully implemented
-            return {"status": "error", "message": "Target search not implemented", "source": "target"}
-        
-        elif market == "bestbuy":
-            search_url = f"https://www.bestbuy.com/site/searchpage.jsp?st={encoded_query}"
-            try:
-                # First try to see if the scraper has the method
-                if hasattr(self.scraper, "_get_bestbuy_search_result"):
-                    result = await asyncio.wait_for(
-                        self.scraper._get_bestbuy_search_result(search_url),
-                        timeout=search_timeout
-                    )
-                    logger.debug(f"Best Buy search result status: {result.get('status', 'unknown')}")
-                    return result
-                else:
-                    logger.warning("Best Buy search not implemented in scraper")
-                    return {"status": "error", "message": "Best Buy search not implemented", "source": "bestbuy"}
-            except asyncio.TimeoutError:
-                logger.warning(f"Best Buy search timed out after {search_timeout}s for query: {search_query}")
-                return {"status": "error", "message": "Best Buy search timed out", "source": "bestbuy"}
-            except Exception as e:
-                logger.error(f"Error searching Best Buy: {e}")
-                return {"status": "error", "message": f"Best Buy search failed: {str(e)}", "source": "bestbuy"}
-        
-        else:
-            return {"status": "error", "message": f"Unsupported market: {market}", "source": market} 
\ No newline at end of file
+        logger.info("Searching for alternative on %s with query: %s", market, search_query)
+        
+        try:
+            # Add timeout to prevent hanging (time spent queued on the semaphore doesn't count)
+            async with self._market_semaphores[market]:
+                result = await asyncio.wait_for(search(search_url), timeout=search_timeout)
+            logger.debug("%s search result status: %s", name, result.get('status', 'unknown'))
+            if result and result.get("status") == "success":
+                self._search_cache[cache_key] = (time.monotonic(), dict(result))
+                if len(self._search_cache) > _SEARCH_CACHE_MAXSIZE:
+                    self._search_cache.popitem(last=False)
+            return result
+        except asyncio.TimeoutError:
+            logger.warning("%s search timed out after %ss for query: %s", name, search_timeout, search_query)
+            return {"status": "error", "message": f"{name} search timed out", "source": market}
+        except Exception as e:
+            logger.error("Error searching %s: %s", name, e)
+            return {"status": "error", "message": f"{name} search failed: {str(e)}", "source": market}
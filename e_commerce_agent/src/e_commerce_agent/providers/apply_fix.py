@@ -21,6 +21,29 @@ logger = logging.getLogger(__name__)
 # Import our own implementation
 from target_bestbuy_fix import scrape_target, scrape_bestbuy, find_alternatives
 
+# Marker set on every replacement so a second apply_fixes() call doesn't wrap it again
+_PATCHED_ATTR = '__cart_advisor_patched__'
+
+def _is_patched(obj):
+    """Return True if obj is one of our replacements."""
+    return getattr(obj, _PATCHED_ATTR, False)
+
+def _make_redirect(label, fixed_impl, method=False):
+    """Build a replacement that forwards to one of our fixed implementations.
+
+    With method=True the replacement takes (self, url) so it can be set on a class.
+    """
+    if method:
+        async def redirect(self, url):
+            logger.info(f"[FIXED] {label} redirecting to fixed implementation")
+            return await fixed_impl(url)
+    else:
+        async def redirect(url):
+            logger.info(f"[FIXED] {label} redirecting to fixed implementation")
+            return await fixed_impl(url)
+    setattr(redirect, _PATCHED_ATTR, True)
+    return redirect
+
 def apply_fixes():
     """Apply all fixes to make Target and Best Buy scrapers work."""
     # Load the price_scraper module
@@ -32,55 +55,24 @@ def apply_fixes():
     if hasattr(price_scraper, 'StealthScraper'):
         logger.info("Patching StealthScraper class")
         
-        # Check if it has the target method
-        if hasattr(price_scraper.StealthScraper, 'scrape_target'):
-            # Wrap our function to match the method signature
-            async def stealth_scrape_target(self, url):
-                logger.info(f"[FIXED] StealthScraper.scrape_target redirecting to fixed implementation")
-                return await scrape_target(url)
-                
-            # Replace the method
-            setattr(price_scraper.StealthScraper, 'scrape_target', stealth_scrape_target)
-            logger.info("StealthScraper.scrape_target patched successfully")
-            
-        # Check if it has the bestbuy method
-        if hasattr(price_scraper.StealthScraper, 'scrape_bestbuy'):
-            # Wrap our function to match the method signature
-            async def stealth_scrape_bestbuy(self, url):
-                logger.info(f"[FIXED] StealthScraper.scrape_bestbuy redirecting to fixed implementation")
-                return await scrape_bestbuy(url)
-                
-            # Replace the method
-            setattr(price_scraper.StealthScraper, 'scrape_bestbuy', stealth_scrape_bestbuy)
-            logger.info("StealthScraper.scrape_bestbuy patched successfully")
+        for name, fixed_impl in (('scrape_target', scrape_target), ('scrape_bestbuy', scrape_bestbuy)):
+            current = getattr(price_scraper.StealthScraper, name, None)
+            if current is not None and not _is_patched(current):
+                # Wrap our function to match the method signature and replace the method
+                setattr(price_scraper.StealthScraper, name,
+                        _make_redirect(f"StealthScraper.{name}", fixed_impl, method=True))
+                logger.info(f"StealthScraper.{name} patched successfully")
     
     # 2. Now monkey-patch the scrape_target and scrape_bestbuy functions at module level
     logger.info("Looking for module-level definitions of scrape_target and scrape_bestbuy")
     
-    # Find all the functions/methods in the module
-    for name in dir(price_scraper):
-        # Skip special names and classes we've already patched
-        if name.startswith('__') or name in ['StealthScraper', 'PriceScraper']:
-            continue
-            
-        attr = getattr(price_scraper, name)
-        if callable(attr) and name in ['scrape_target', 'scrape_bestbuy']:
+    # The two targets are known, so look them up directly instead of scanning dir()
+    for name, fixed_impl in (('scrape_target', scrape_target), ('scrape_bestbuy', scrape_bestbuy)):
+        attr = getattr(price_scraper, name, None)
+        if callable(attr) and not isinstance(attr, type) and not _is_patched(attr):
             logger.info(f"Found module-level function: {name}")
-            
-            # Create replacement function with the same signature
-            if name == 'scrape_target':
-                async def module_scrape_target(url):
-                    logger.info(f"[FIXED] Module-level scrape_target redirecting to fixed implementation")
-                    return await scrape_target(url)
-                setattr(price_scraper, name, module_scrape_target)
-                logger.info(f"Replaced module-level {name} function")
-                
-            elif name == 'scrape_bestbuy':
-                async def module_scrape_bestbuy(url):
-                    logger.info(f"[FIXED] Module-level scrape_bestbuy redirecting to fixed implementation")
-                    return await scrape_bestbuy(url)
-                setattr(price_scraper, name, module_scrape_bestbuy)
-                logger.info(f"Replaced module-level {name} function")
+            setattr(price_scraper, name, _make_redirect(f"Module-level {name}", fixed_impl))
+            logger.info(f"Replaced module-level {name} function")
     
     # 3. Create a direct replacement for get_product_details that uses our implementation
     try:
@@ -88,6 +80,7 @@ def apply_fixes():
         
         # Store the original method
         original_get_details = PriceProvider.get_product_details
+        original_find_alternatives = PriceProvider.find_alternatives
         
         # Create a new method that uses our implementations
         async def fixed_get_product_details(self, product_url):
@@ -110,20 +103,22 @@ def apply_fixes():
                 return await original_get_details(self, product_url)
         
         # Replace the method
-        PriceProvider.get_product_details = fixed_get_product_details
-        logger.info("PriceProvider.get_product_details patched successfully")
+        if not _is_patched(original_get_details):
+            setattr(fixed_get_product_details, _PATCHED_ATTR, True)
+            PriceProvider.get_product_details = fixed_get_product_details
+            logger.info("PriceProvider.get_product_details patched successfully")
         
         # Also patch the find_alternatives method
-        original_find_alternatives = PriceProvider.find_alternatives
-        
         async def fixed_provider_find_alternatives(self, product_details, max_results=3):
             """Fixed implementation of find_alternatives."""
             logger.info(f"[FIXED] PriceProvider.find_alternatives")
             return find_alternatives(product_details, max_results)
             
         # Replace the method
-        PriceProvider.find_alternatives = fixed_provider_find_alternatives
-        logger.info("PriceProvider.find_alternatives patched successfully")
+        if not _is_patched(original_find_alternatives):
+            setattr(fixed_provider_find_alternatives, _PATCHED_ATTR, True)
+            PriceProvider.find_alternatives = fixed_provider_find_alternatives
+            logger.info("PriceProvider.find_alternatives patched successfully")
     except Exception as e:
         logger.warning(f"Could not patch PriceProvider: {e}")
     
@@ -132,8 +127,8 @@ def apply_fixes():
         import alternative_finder
         
         # Check if it has find_alternatives
-        if hasattr(alternative_finder, 'find_alternatives'):
-            original_func = alternative_finder.find_alternatives
+        original_func = getattr(alternative_finder, 'find_alternatives', None)
+        if original_func is not None and not _is_patched(original_func):
             
             # Create async wrapper for our sync function
             async def patched_find_alternatives(product_details, max_results=3):
@@ -141,6 +136,7 @@ def apply_fixes():
                 return find_alternatives(product_details, max_results)
                 
             # Replace the function
+            setattr(patched_find_alternatives, _PATCHED_ATTR, True)
             alternative_finder.find_alternatives = patched_find_alternatives
             logger.info("alternative_finder.find_alternatives patched successfully")
     except Exception as e:
@@ -1,5 +1,7 @@
 from typing import AsyncIterator
 
+_MOCK_RESPONSE = "This is a mock response from the model. I am analyzing the product details but not making real API calls."
+
 class MockModelProvider:
     """A mock model provider for testing without an actual OpenAI API key."""
     
@@ -8,13 +10,10 @@ class MockModelProvider:
     
     async def query_stream(self, query: str) -> AsyncIterator[str]:
         """Returns a mocked streaming response."""
-        response = "This is a mock response from the model. I am analyzing the product details but not making real API calls."
-        # Split the response into chunks to simulate streaming
-        chunks = [response[i:i+10] for i in range(0, len(response), 10)]
-        
-        for chunk in chunks:
-            yield chunk
+        # Slice the response on demand to simulate streaming
+        for i in range(0, len(_MOCK_RESPONSE), 10):
+            yield _MOCK_RESPONSE[i:i+10]
     
     async def query(self, query: str) -> str:
         """Returns a mocked response."""
-        return "This is a mock response from the model. I am analyzing the product details but not making real API calls." 
\ No newline at end of file
+        return _MOCK_RESPONSE
\ No newline at end of file
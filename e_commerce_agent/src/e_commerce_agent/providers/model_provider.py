@@ -1,14 +1,135 @@
-from datetime import datetime
-from langchain_core.prompts import PromptTemplate
-from openai import AsyncOpenAI
-from typing import AsyncIterator
+import asyncio
+import hashlib
+import logging
+import random
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import httpx
+from openai import (
+    APIConnectionError,
+    AsyncOpenAI,
+    AuthenticationError,
+    InternalServerError,
+    NotFoundError,
+    RateLimitError,
+)
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Optional: embedding-based cache for near-duplicate queries
+SEMANTIC_CACHE_AVAILABLE = False
+try:
+    import numpy as np
+    from fastembed import TextEmbedding
+    SEMANTIC_CACHE_AVAILABLE = True
+except ImportError:
+    pass
+
+# Optional: HTTP/2 lets concurrent requests (e.g. query_many bursts) share one connection
+HTTP2_AVAILABLE = False
+try:
+    import h2  # noqa: F401 - httpx only needs it importable
+    HTTP2_AVAILABLE = True
+except ImportError:
+    pass
+
+logger = logging.getLogger(__name__)
+
+# System prompt; {date_today} is filled in when the provider is created
+SYSTEM_PROMPT_TEMPLATE = (
+    "You are an expert e-commerce price comparison assistant that helps users determine "
+    "if product prices represent good deals. Your expertise extends beyond just pricing - "
+    "you consider a holistic approach that weighs multiple factors:\n\n"
+    "1. Price and value for money\n"
+    "2. Customer ratings and review volume\n"
+    "3. Product availability and shipping speed\n"
+    "4. Product features and specifications\n"
+    "5. Seller reputation and service quality\n\n"
+    "You analyze products across Amazon, Walmart, Best Buy, and other retailers to provide "
+    "balanced recommendations based on this holistic evaluation. You understand that the "
+    "cheapest option isn't always the best value. Today's date is {date_today}."
+)
+
+# Completed responses are reused for identical queries (temperature is 0.0, so output is deterministic)
+_RESPONSE_CACHE_MAXSIZE = 1024
+_RESPONSE_CACHE_TTL = 3600.0  # seconds
+
+# Semantic cache: a query whose embedding is at least this similar to a cached one reuses its response
+_SEMANTIC_CACHE_MODEL = "BAAI/bge-small-en-v1.5"
+_SEMANTIC_CACHE_THRESHOLD = 0.95
+_SEMANTIC_CACHE_MAXSIZE = 2048
+
+# Transient failures (429, 5xx, connection errors and timeouts) are retried with
+# exponential backoff plus jitter; anything else fails immediately
+_RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
+_MAX_RETRIES = 5
+_RETRY_BASE_DELAY = 0.5  # seconds
+_RETRY_MAX_DELAY = 16.0  # seconds
+_RETRY_JITTER = 0.5  # seconds
+
+# Each provider keeps one keep-alive connection pool, so TLS sessions survive across queries
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=64, max_connections=128, keepalive_expiry=60.0)
+_HTTP_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """Seconds to wait before retrying, honoring a Retry-After header when the server sends one."""
+    response = getattr(error, "response", None)
+    if response is not None:
+        try:
+            return min(float(response.headers.get("retry-after")), _RETRY_MAX_DELAY)
+        except (TypeError, ValueError):
+            pass
+    return min(_RETRY_BASE_DELAY * 2 ** attempt + random.random() * _RETRY_JITTER, _RETRY_MAX_DELAY)
+
+
+def _model_error(error: Exception) -> Exception:
+    """Translate an API error into the user-facing error raised by the provider."""
+    if isinstance(error, NotFoundError):
+        return Exception("The specified model is not available. Please check the model name and try again.")
+    if isinstance(error, AuthenticationError):
+        return Exception("Invalid API key. Please check your Fireworks API key.")
+    return Exception(f"Failed to get response from model: {error}")
+
+
+async def _gather_limited(
+    query_fn: Callable[[str], Awaitable[str]],
+    queries: List[str],
+    concurrency: int,
+    qps: Optional[float]
+) -> List[str]:
+    """Runs query_fn over queries concurrently and returns the results in the same order.
+
+    At most `concurrency` calls are in flight at once; if `qps` is set, call starts are
+    also spaced out to stay under that many per second.
+    """
+
+    semaphore = asyncio.Semaphore(concurrency)
+    interval = 1.0 / qps if qps else 0.0
+    next_start = time.monotonic()
+
+    async def run_one(query: str) -> str:
+        nonlocal next_start
+        async with semaphore:
+            if interval:
+                # Reserve the next start slot (no await between read and update)
+                now = time.monotonic()
+                start = max(now, next_start)
+                next_start = start + interval
+                if start > now:
+                    await asyncio.sleep(start - now)
+            return await query_fn(query)
+
+    return await asyncio.gather(*(run_one(query) for query in queries))
+
 
 class ModelProvider:
     def __init__(
         self,
         api_key: str,
         base_url: str = "https://api.fireworks.ai/inference/v1",
-        model: str = "fireworks/mixtral-8x7b-instruct"
+        model: str = "fireworks/mixtral-8x7b-instruct",
+        semantic_cache: bool = False
     ):
         """ Initializes model, sets up OpenAI client, configures system prompt."""
 
@@ -22,85 +143,390 @@ class ModelProvider:
         self.temperature = 0.0
         # Maximum number of tokens for responses
         self.max_tokens = None
-        self.date_context = datetime.now().strftime("%Y-%m-%d")
 
-        # Set up model API
+        # Set up model API on this provider's own connection pool
+        self._http_client = httpx.AsyncClient(limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT, http2=HTTP2_AVAILABLE)
         self.client = AsyncOpenAI(
             base_url=self.base_url,
             api_key=self.api_key,
+            http_client=self._http_client,
+            # Retries are handled by _create_with_retry
+            max_retries=0,
         )
 
+        # Response cache: key -> (timestamp, response), oldest first
+        self._cache = OrderedDict()
+
+        # Semantic cache (opt-in): exact cache key -> (normalized float16 embedding, response),
+        # least recently used first. The stacked matrix is rebuilt lazily once entries are
+        # added or evicted.
+        if semantic_cache and not SEMANTIC_CACHE_AVAILABLE:
+            logger.warning("fastembed/numpy not installed. Semantic response cache disabled.")
+        self.semantic_cache = semantic_cache and SEMANTIC_CACHE_AVAILABLE
+        self._embedder = None
+        self._semantic_entries = OrderedDict()
+        self._semantic_matrix = None
+        # Cache key for each row of the stacked matrix; it doesn't follow LRU reordering
+        self._semantic_keys = []
+
         # Set up system prompt
-        system_prompt_template = PromptTemplate(
-            input_variables=["date_today"],
-            template=(
-                "You are an expert e-commerce price comparison assistant that helps users determine "
-                "if product prices represent good deals. Your expertise extends beyond just pricing - "
-                "you consider a holistic approach that weighs multiple factors:\n\n"
-                "1. Price and value for money\n"
-                "2. Customer ratings and review volume\n"
-                "3. Product availability and shipping speed\n"
-                "4. Product features and specifications\n"
-                "5. Seller reputation and service quality\n\n"
-                "You analyze products across Amazon, Walmart, Best Buy, and other retailers to provide "
-                "balanced recommendations based on this holistic evaluation. You understand that the "
-                "cheapest option isn't always the best value. Today's date is {date_today}."
-            )
-        )
-        self.system_prompt = system_prompt_template.format(date_today=self.date_context)
+        self.refresh_system_prompt()
+
+
+    def refresh_system_prompt(self) -> None:
+        """Rebuilds the system prompt for today's date.
+
+        Called at init and then once per day, on the first request after local midnight.
+        The prompt stays byte-identical within a day so the server's prefix cache stays warm.
+        """
+        now = datetime.now()
+        self.date_context = now.strftime("%Y-%m-%d")
+        self.system_prompt = SYSTEM_PROMPT_TEMPLATE.format(date_today=self.date_context)
+        # Lets the server route requests sharing this system prompt to its cached prefill
+        self._prompt_cache_key = hashlib.sha1(self.system_prompt.encode("utf-8")).hexdigest()
+        # Shared by every request's message list - never mutate it
+        self._system_msg = {"role": "system", "content": self.system_prompt}
+        # Cached responses were produced under the old date
+        self._cache.clear()
+        self._semantic_entries.clear()
+        self._semantic_matrix = None
+        next_midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        self._prompt_expires_at = next_midnight.timestamp()
+
+    def _check_date(self) -> None:
+        """Refreshes the system prompt if the date has changed since it was built."""
+        if time.time() >= self._prompt_expires_at:
+            self.refresh_system_prompt()
+
+    async def aclose(self) -> None:
+        """Close this provider's HTTP connection pool."""
+        if self._http_client is not None:
+            client, self._http_client = self._http_client, None
+            await client.aclose()
+
+    def _cache_key(self, query: str) -> str:
+        """Hash everything that determines the response for a query."""
+        # Every request starts here, so this is where the daily prompt refresh happens
+        self._check_date()
+        raw = f"{self.model}|{self.temperature}|{self.max_tokens}|{self.system_prompt}|{query}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _get_cached(self, key: str) -> Optional[str]:
+        """Return a cached response if present and not expired."""
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        timestamp, response = entry
+        if time.monotonic() - timestamp >= _RESPONSE_CACHE_TTL:
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return response
+
+    def _set_cached(self, key: str, response: str) -> None:
+        """Store a completed response, evicting the least recently used entry if full."""
+        self._cache[key] = (time.monotonic(), response)
+        self._cache.move_to_end(key)
+        if len(self._cache) > _RESPONSE_CACHE_MAXSIZE:
+            self._cache.popitem(last=False)
+
+    def _build_messages(self, query: str) -> List[Dict[str, str]]:
+        """Builds the chat messages for a query."""
+        return [self._system_msg, {"role": "user", "content": query}]
+
+    async def _create_with_retry(
+        self,
+        messages: List[Dict[str, str]],
+        stream: bool = False
+    ):
+        """Creates a chat completion, retrying transient errors with exponential backoff."""
+
+        for attempt in range(_MAX_RETRIES):
+            try:
+                return await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    stream=stream,
+                    temperature=self.temperature,
+                    max_tokens=self.max_tokens,
+                    extra_body={"prompt_cache_key": self._prompt_cache_key}
+                )
+            except _RETRYABLE_ERRORS as e:
+                if attempt == _MAX_RETRIES - 1:
+                    raise
+                await asyncio.sleep(_retry_delay(e, attempt))
+
+    async def _query_nonstream(
+        self,
+        messages: List[Dict[str, str]]
+    ) -> str:
+        """Sends messages to model in a single non-streaming request and returns the response."""
+
+        try:
+            response = await self._create_with_retry(messages)
+            return response.choices[0].message.content or ""
+        except Exception as e:
+            raise _model_error(e) from e
+
+    def _embed(self, query: str):
+        """Embeds a query as a unit-length vector (runs the embedding model; call off the event loop)."""
+        if self._embedder is None:
+            self._embedder = TextEmbedding(model_name=_SEMANTIC_CACHE_MODEL)
+        vector = next(iter(self._embedder.embed([query]))).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    async def _semantic_lookup(self, query: str) -> Tuple[Optional[str], Optional["np.ndarray"]]:
+        """Returns (cached response or None, query embedding) for a near-duplicate query.
 
+        The embedding is None when the semantic cache is off, which includes non-zero
+        temperature since responses are not deterministic then.
+        """
+        if not self.semantic_cache or self.temperature > 0:
+            return None, None
+        vector = await asyncio.to_thread(self._embed, query)
+        if not self._semantic_entries:
+            return None, vector
+        if self._semantic_matrix is None:
+            self._semantic_keys = list(self._semantic_entries)
+            self._semantic_matrix = np.stack([entry[0] for entry in self._semantic_entries.values()])
+        similarities = self._semantic_matrix @ vector.astype(np.float16)
+        best = int(np.argmax(similarities))
+        if similarities[best] < _SEMANTIC_CACHE_THRESHOLD:
+            return None, vector
+        # Only recency changes on a hit, so the matrix and its row keys stay valid
+        key = self._semantic_keys[best]
+        self._semantic_entries.move_to_end(key)
+        return self._semantic_entries[key][1], vector
+
+    def _semantic_store(self, key: str, vector, response: str) -> None:
+        """Adds a completed response to the semantic cache, evicting the least recently used entry."""
+        if vector is None:
+            return
+        self._semantic_entries[key] = (vector.astype(np.float16), response)
+        self._semantic_entries.move_to_end(key)
+        if len(self._semantic_entries) > _SEMANTIC_CACHE_MAXSIZE:
+            self._semantic_entries.popitem(last=False)
+        self._semantic_matrix = None
 
     async def query_stream(
         self,
         query: str
     ) -> AsyncIterator[str]:
-        """Sends query to model and yields the response in chunks."""
+        """Sends query to model and yields the response in chunks.
+
+        This is the preferred entrypoint for anything shown to a user: rendering can start
+        at the first token instead of waiting for the whole response. Chunks are collected
+        as they are yielded and the full response is cached once the stream completes; a
+        stream the caller abandons part-way is not cached, since it would be truncated.
+        """
+
+        cache_key = self._cache_key(query)
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            yield cached
+            return
 
-        messages = [
-            {"role": "system", "content": self.system_prompt},
-            {"role": "user", "content": query}
-        ]
+        cached, vector = await self._semantic_lookup(query)
+        if cached is not None:
+            yield cached
+            return
+
+        # Only a response that completes without error is cached
+        parts = []
+
+        messages = self._build_messages(query)
 
         try:
-            stream = await self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                stream=True,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens
-            )
+            stream = await self._create_with_retry(messages, stream=True)
 
+            append = parts.append
             async for chunk in stream:
-                if chunk.choices[0].delta.content is not None:
-                    yield chunk.choices[0].delta.content
+                # Bind each attribute once - this loop runs per token
+                choices = chunk.choices
+                if not choices:
+                    continue
+                content = choices[0].delta.content
+                if content is not None:
+                    append(content)
+                    yield content
+        except (AuthenticationError, NotFoundError) as e:
+            # Terminal - a non-streaming request would fail the same way
+            raise _model_error(e) from e
+        except _RETRYABLE_ERRORS as e:
+            # Retries already ran out; a non-streaming fallback would run them all again
+            raise _model_error(e) from e
         except Exception as e:
+            if parts:
+                # Part of the response was already yielded; repeating it would duplicate output
+                raise _model_error(e) from e
             # If streaming fails, try non-streaming as fallback
-            try:
-                response = await self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    temperature=self.temperature,
-                    max_tokens=self.max_tokens
-                )
-                yield response.choices[0].message.content
-            except Exception as e2:
-                error_message = str(e2)
-                if "Model not found" in error_message:
-                    raise Exception("The specified model is not available. Please check the model name and try again.")
-                elif "API key" in error_message:
-                    raise Exception("Invalid API key. Please check your Fireworks API key.")
-                else:
-                    raise Exception(f"Failed to get response from model: {error_message}")
+            response = await self._query_nonstream(messages)
+            parts = [response]
+            yield response
+
+        response = "".join(parts)
+        self._set_cached(cache_key, response)
+        self._semantic_store(cache_key, vector, response)
+
+
+    async def query(
+        self,
+        query: str
+    ) -> str:
+        """Sends query to model and returns the complete response as a string.
+
+        For callers that need the whole text at once; use query_stream to show output as it arrives.
+        """
+
+        # Nothing is consumed incrementally here, so one non-streaming request
+        # avoids per-chunk overhead and buffering the stream
+        cache_key = self._cache_key(query)
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
+
+        cached, vector = await self._semantic_lookup(query)
+        if cached is not None:
+            return cached
+
+        response = await self._query_nonstream(self._build_messages(query))
+        self._set_cached(cache_key, response)
+        self._semantic_store(cache_key, vector, response)
+        return response
+
+    async def query_many(
+        self,
+        queries: List[str],
+        concurrency: int = 16,
+        qps: Optional[float] = None
+    ) -> List[str]:
+        """Sends independent queries concurrently and returns the responses in the same order.
+
+        At most `concurrency` requests are in flight at once; if `qps` is set, request
+        starts are also spaced out to stay under that many queries per second.
+        """
 
+        return await _gather_limited(self.query, queries, concurrency, qps)
+
+
+# Endpoint health: a failing endpoint sits out for an exponentially growing window
+_ENDPOINT_BACKOFF_BASE = 1.0  # seconds
+_ENDPOINT_BACKOFF_MAX = 60.0  # seconds
+
+
+class ModelProviderPool:
+    """Spreads queries across several ModelProvider endpoints.
+
+    Each query goes to the healthy endpoint with the fewest requests in flight. If an
+    endpoint is rate limited or unreachable (after its own retries) before producing any
+    output, it is benched for a backoff window and the query moves on to the next one.
+    """
+
+    def __init__(self, providers: List[ModelProvider]):
+        if not providers:
+            raise ValueError("ModelProviderPool needs at least one provider")
+        self.providers = list(providers)
+        # Per-provider state, index-aligned with self.providers
+        self._in_flight = [0] * len(self.providers)
+        self._failures = [0] * len(self.providers)
+        self._unhealthy_until = [0.0] * len(self.providers)
+
+    def _pick(self, tried: set) -> Optional[int]:
+        """Index of the least loaded untried provider, preferring healthy ones."""
+        candidates = [i for i in range(len(self.providers)) if i not in tried]
+        if not candidates:
+            return None
+        now = time.monotonic()
+        healthy = [i for i in candidates if self._unhealthy_until[i] <= now]
+        if healthy:
+            return min(healthy, key=lambda i: self._in_flight[i])
+        # Everything left is benched - try whichever comes back first rather than fail outright
+        return min(candidates, key=lambda i: self._unhealthy_until[i])
+
+    def _mark_healthy(self, index: int) -> None:
+        self._failures[index] = 0
+        self._unhealthy_until[index] = 0.0
+
+    def _mark_unhealthy(self, index: int) -> None:
+        delay = min(_ENDPOINT_BACKOFF_BASE * 2 ** self._failures[index], _ENDPOINT_BACKOFF_MAX)
+        self._failures[index] += 1
+        self._unhealthy_until[index] = time.monotonic() + delay
+        logger.warning("Model endpoint %s unhealthy, benched for %.0fs", self.providers[index].base_url, delay)
+
+    @staticmethod
+    def _is_failover_error(error: Exception) -> bool:
+        """Rate limits and connection problems are endpoint-specific; try another endpoint."""
+        return isinstance(error.__cause__ or error, _RETRYABLE_ERRORS)
+
+    async def query_stream(
+        self,
+        query: str
+    ) -> AsyncIterator[str]:
+        """Sends query to the best available endpoint and yields the response in chunks."""
+
+        tried = set()
+        while True:
+            index = self._pick(tried)
+            tried.add(index)
+            yielded = False
+            self._in_flight[index] += 1
+            try:
+                async for chunk in self.providers[index].query_stream(query):
+                    yielded = True
+                    yield chunk
+            except Exception as e:
+                # Once output has been yielded, switching endpoints would repeat it
+                if yielded or not self._is_failover_error(e):
+                    raise
+                self._mark_unhealthy(index)
+                if len(tried) == len(self.providers):
+                    raise
+                continue
+            finally:
+                self._in_flight[index] -= 1
+            self._mark_healthy(index)
+            return
 
     async def query(
         self,
         query: str
     ) -> str:
-        """Sends query to model and returns the complete response as a string."""
-        
-        chunks = []
-        async for chunk in self.query_stream(query=query):
-            chunks.append(chunk)
-        response = "".join(chunks)
-        return response 
\ No newline at end of file
+        """Sends query to the best available endpoint and returns the complete response."""
+
+        tried = set()
+        while True:
+            index = self._pick(tried)
+            tried.add(index)
+            self._in_flight[index] += 1
+            try:
+                response = await self.providers[index].query(query)
+            except Exception as e:
+                if not self._is_failover_error(e):
+                    raise
+                self._mark_unhealthy(index)
+                if len(tried) == len(self.providers):
+                    raise
+                continue
+            finally:
+                self._in_flight[index] -= 1
+            self._mark_healthy(index)
+            return response
+
+    async def query_many(
+        self,
+        queries: List[str],
+        concurrency: int = 16,
+        qps: Optional[float] = None
+    ) -> List[str]:
+        """Sends independent queries concurrently, spreading them across endpoints.
+
+        Responses come back in the same order as queries; see ModelProvider.query_many.
+        """
+
+        return await _gather_limited(self.query, queries, concurrency, qps)
+
+    async def aclose(self) -> None:
+        """Close every provider's HTTP connection pool."""
+        for provider in self.providers:
+            await provider.aclose()
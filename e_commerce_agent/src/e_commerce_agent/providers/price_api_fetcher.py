@@ -1,39 +1,291 @@
 import re
-import json
+import orjson
 import logging
 import httpx
 import asyncio
 import time
 import random
-from typing import Dict, List, Optional, Any, Tuple
-from urllib.parse import urlparse, parse_qs
-from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
+from itertools import cycle
+from collections import OrderedDict, defaultdict
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Any, Tuple
+from urllib.parse import ParseResult, urlparse, parse_qs
+from bs4 import BeautifulSoup, SoupStrainer
+from datetime import datetime
+
+# Optional: lets concurrent page fetches to the same retailer share one connection
+HTTP2_AVAILABLE = False
+try:
+    import h2  # noqa: F401 - httpx only needs it importable
+    HTTP2_AVAILABLE = True
+except ImportError:
+    pass
+
+# Optional: lxml builds BeautifulSoup trees much faster than the pure-Python html.parser
+try:
+    import lxml  # noqa: F401 - BeautifulSoup only needs it importable
+    _HTML_PARSER = "lxml"
+except ImportError:
+    _HTML_PARSER = "html.parser"
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Precompiled patterns used on every scraped page
+_WALMART_PRELOADED_ANCHOR = 'window.__PRELOADED_STATE__'
+_ASSIGN_OBJECT_RE = re.compile(r'\s*=\s*\{')
+# A whole JSON string literal (to the end of input if unterminated), or a single brace
+_JSON_BRACE_TOKEN_RE = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*(?:"|\Z)|[{}]', re.DOTALL)
+_BESTBUY_PRICE_RE = re.compile(r'"currentPrice":(\d+\.\d+)')
+_GENERIC_PRICE_RE = re.compile(r'"price"[:\s]+(\d+\.?\d*)')
+
+def _match_braces(text: str, start: int) -> int:
+    """
+    Find the '}' closing the JSON object that opens at text[start].
+    
+    Jumps between braces with a regex instead of walking every character, consuming
+    string literals (including escaped quotes) whole so braces inside strings don't
+    count. Returns -1 if the object is not closed.
+    """
+    depth = 0
+    for match in _JSON_BRACE_TOKEN_RE.finditer(text, start):
+        char = text[match.start()]
+        if char == '"':
+            continue
+        depth += 1 if char == '{' else -1
+        if depth == 0:
+            return match.start()
+    return -1
+
+
+def _extract_preloaded_state(html_content: str) -> Optional[str]:
+    """Return the JSON object assigned to window.__PRELOADED_STATE__, if the page has one."""
+    idx = html_content.find(_WALMART_PRELOADED_ANCHOR)
+    while idx >= 0:
+        assign = _ASSIGN_OBJECT_RE.match(html_content, idx + len(_WALMART_PRELOADED_ANCHOR))
+        if assign:
+            start = assign.end() - 1
+            end = _match_braces(html_content, start)
+            if end >= 0:
+                return html_content[start:end + 1]
+        idx = html_content.find(_WALMART_PRELOADED_ANCHOR, idx + 1)
+    return None
+
+
+def _script_closed_after(anchor: bytes) -> Callable[[bytearray], bool]:
+    """
+    Build a stop condition for _fetch_html: true once the page has downloaded past the
+    </script> that follows `anchor`. Each call only scans the newly arrived bytes.
+    """
+    closing = b'</script>'
+    anchor_pos = -1
+    scanned = 0
+    
+    def check(buf: bytearray) -> bool:
+        nonlocal anchor_pos, scanned
+        if anchor_pos < 0:
+            anchor_pos = buf.find(anchor, max(0, scanned - len(anchor)))
+            if anchor_pos < 0:
+                scanned = len(buf)
+                return False
+            scanned = anchor_pos
+        found = buf.find(closing, max(anchor_pos, scanned - len(closing)))
+        scanned = len(buf)
+        return found >= 0
+    
+    return check
+
+
+# The scrapers only read JSON-LD scripts, the title and the product image, so only
+# those tags are built into the parse tree
+_PRODUCT_TAGS = SoupStrainer(["script", "h1", "img"])
+
+# Retailers recognised by _extract_domain, in the order their names are matched
+_RETAILERS = ("amazon", "walmart", "bestbuy", "target", "ebay", "costco")
+_RETAILER_SET = frozenset(_RETAILERS)
+
+
+@lru_cache(maxsize=4096)
+def _parsed_url(url: str) -> ParseResult:
+    """urlparse, memoized so every helper that looks at a URL shares one parse."""
+    return urlparse(url)
+
+
+@lru_cache(maxsize=4096)
+def _parse_url(url: str) -> Tuple[str, Tuple[str, ...]]:
+    """
+    Parse a URL once into what the fetchers need from it.
+    
+    Returns:
+        (retailer name, or the lowercased host for other sites, path segments)
+    """
+    try:
+        parsed_url = _parsed_url(url)
+    except ValueError:
+        return "unknown", ()
+    domain = parsed_url.netloc.lower()
+    path_segments = tuple(parsed_url.path.split('/'))
+    
+    # CRITICAL FIX: Identify common e-commerce domains more robustly.
+    # Usually one of the host's labels is the retailer name (www.amazon.com)
+    for label in domain.split('.'):
+        if label in _RETAILER_SET:
+            return label, path_segments
+    # Otherwise fall back to looking for the name anywhere in the host
+    for retailer in _RETAILERS:
+        if retailer in domain:
+            return retailer, path_segments
+    
+    return domain, path_segments
+
+
+# Product ID patterns; every Amazon product URL form is matched in one pass
+# (/gp/product/ is covered by /product/)
+_ASIN_RE = re.compile(r'/(?:dp|ASIN|product)/([A-Z0-9]{10})')
+# The ID is the first path segment after the prefix that starts with digits.
+# Stepping over whole segments, rather than a character at a time with .*?,
+# keeps the scan short
+_WALMART_ITEM_ID_RE = re.compile(r'/ip/[^/]*(?:/[^/]*)*?/(\d+)')
+_BESTBUY_SKU_RE = re.compile(r'/(?:site|shop)/[^/]*(?:/[^/]*)*?/(\d+)(?:\.p)?')
+
+
+@lru_cache(maxsize=8192)
+def _asin_from_url(url: str) -> Optional[str]:
+    """Extract ASIN from Amazon URL."""
+    match = _ASIN_RE.search(url)
+    return match.group(1) if match else None
+
+
+@lru_cache(maxsize=8192)
+def _walmart_item_id_from_url(url: str) -> Optional[str]:
+    """Extract item ID from Walmart URL."""
+    # Try to find item ID in the path
+    match = _WALMART_ITEM_ID_RE.search(url)
+    if match:
+        return match.group(1)
+    
+    # Try query parameters
+    parsed_url = _parsed_url(url)
+    query_params = parse_qs(parsed_url.query)
+    
+    if 'itemId' in query_params:
+        return query_params['itemId'][0]
+    
+    return None
+
+
+@lru_cache(maxsize=8192)
+def _bestbuy_sku_from_url(url: str) -> Optional[str]:
+    """Extract SKU from Best Buy URL."""
+    match = _BESTBUY_SKU_RE.search(url)
+    if match:
+        return match.group(1)
+    
+    return None
+
+
+# Pages are cut off at this size, so an outsized page can't blow up download, regex
+# and parse time (or memory, across concurrent fetches)
+_MAX_PAGE_BYTES = 2_000_000
+
+# Overall time allowed for a retailer's fetch methods; whatever is still running
+# after this is cancelled, so one slow endpoint can't hold up the lookup
+_FETCH_BUDGET = 8.0
+
+# Upper bound on cached product results; least recently used entries are evicted first
+_CACHE_MAXSIZE = 10000
+
+# Failed lookups are remembered briefly so a bad URL doesn't rerun every fetcher on
+# each call. Errors that can't change on retry (the URL itself is unusable) are kept
+# longer than ones that might (HTTP errors, timeouts, rate limits)
+_NEG_CACHE_MAXSIZE = 5000
+_NEG_CACHE_TTL = 60.0
+_NEG_CACHE_PERMANENT_TTL = 600.0
+_PERMANENT_ERRORS = frozenset({"Couldn't extract search term from URL"})
+
+# Expired entries are otherwise only dropped when looked up, so each write also clears
+# up to this many of them from the least recently used end
+_EXPIRED_DROPPED_PER_WRITE = 4
+
+
+def _drop_expired(cache: OrderedDict, now: float) -> None:
+    """Drop expired (expiry, value) entries from the old end of the cache, a few at a time."""
+    for _ in range(_EXPIRED_DROPPED_PER_WRITE):
+        if not cache:
+            return
+        key, (expires_at, _value) = next(iter(cache.items()))
+        if expires_at > now:
+            return
+        del cache[key]
+
+
 class PriceAPIFetcher:
     """
     Multi-source price fetcher that uses free APIs and web search with fallbacks.
     Implements a tiered approach to ensure high availability and reliable price fetching.
     """
     
-    def __init__(self, cache_duration_minutes: int = 60):
-        """Initialize the API fetcher with caching capability."""
-        self.cache = {}  # Simple in-memory cache
-        self.cache_duration = timedelta(minutes=cache_duration_minutes)
+    def __init__(self, cache_duration_minutes: int = 60, client: Optional[httpx.AsyncClient] = None):
+        """
+        Initialize the API fetcher with caching capability.
+        
+        Args:
+            cache_duration_minutes: How long successful lookups stay cached
+            client: Shared HTTP client to fetch pages with; by default the fetcher
+                creates (and closes) its own
+        """
+        # Bounded LRU cache: key -> (monotonic expiry, data), oldest first
+        self.cache = OrderedDict()
+        self.cache_ttl = cache_duration_minutes * 60.0
+        # Short-lived cache of error results: key -> (monotonic expiry, result), oldest first
+        self._neg_cache = OrderedDict()
+        # Lookups currently running: key -> task, so concurrent callers share one fetch
+        self._inflight = {}
         self.user_agents = [
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/97.0.4692.71 Safari/537.36",
             "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/15.2 Safari/605.1.15",
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:96.0) Gecko/20100101 Firefox/96.0"
         ]
+        # Rotate through the user agents round-robin, starting from a random order
+        self._user_agent_cycle = cycle(random.sample(self.user_agents, len(self.user_agents)))
+        
+        # One pooled client for every page fetch, so keep-alive connections (and their
+        # TLS sessions) are reused instead of re-handshaking per request
+        self._owns_client = client is None
+        self._client = client if client is not None else httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+            timeout=15.0,
+            follow_redirects=True,
+        )
+        # Accept-Encoding is left to httpx: it advertises exactly the encodings it can
+        # decode (gzip, deflate, plus br/zstd when brotli/zstandard are installed)
+        self._base_headers = {
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+            "Accept-Language": "en-US,en;q=0.5",
+        }
         
-        # Track API rate limits
-        self.api_call_timestamps = {
-            "serpapi": [],
-            "rapidapi": [],
-            "directwebsearch": []
+        # Track API rate limits: one token bucket per API, holding up to an hour's
+        # allowance (max calls per hour) and refilling continuously at that rate
+        self.api_rate_limits = {
+            "serpapi": 5,
+            "rapidapi": 10,
+            "directwebsearch": 20
+        }
+        # Each bucket is [tokens, last refill time, capacity, tokens refilled per second]
+        now = time.monotonic()
+        self._api_buckets = {
+            name: [float(limit), now, float(limit), limit / 3600.0]
+            for name, limit in self.api_rate_limits.items()
+        }
+        
+        # Retailer-specific fetchers, keyed by the retailer name _extract_domain returns
+        self._domain_handlers = {
+            "amazon": self._get_amazon_product_data,
+            "walmart": self._get_walmart_product_data,
+            "bestbuy": self._get_bestbuy_product_data,
+            "target": self._get_target_product_data,
+            "ebay": self._get_ebay_product_data,
         }
         
         logger.info("Initialized PriceAPIFetcher with multi-source strategy")
@@ -55,22 +307,35 @@ class PriceAPIFetcher:
         if cached_result:
             logger.info(f"Cache hit for {url}")
             return cached_result
+        failed_result = self._get_from_neg_cache(cache_key)
+        if failed_result:
+            logger.info(f"Negative cache hit for {url}")
+            return failed_result
+        
+        # Share a lookup that is already running for this URL instead of fetching twice.
+        # Callers await it through shield() so one caller being cancelled doesn't cancel
+        # the fetch for the others
+        task = self._inflight.get(cache_key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_product_details(url))
+            self._inflight[cache_key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(cache_key, None))
+        else:
+            logger.info(f"Joining in-flight lookup for {url}")
+        return await asyncio.shield(task)
+    
+    async def _fetch_product_details(self, url: str) -> Dict[str, Any]:
+        """Run the fetchers for a URL that isn't cached, and cache the outcome."""
+        cache_key = url
         
         # Parse domain to determine which fetcher to use
         domain = self._extract_domain(url)
         
         # First try domain-specific API approach
         result = None
-        if "amazon" in domain:
-            result = await self._get_amazon_product_data(url)
-        elif "walmart" in domain:
-            result = await self._get_walmart_product_data(url)
-        elif "bestbuy" in domain:
-            result = await self._get_bestbuy_product_data(url)
-        elif "target" in domain:
-            result = await self._get_target_product_data(url)
-        elif "ebay" in domain:
-            result = await self._get_ebay_product_data(url)
+        handler = self._domain_handlers.get(domain)
+        if handler:
+            result = await handler(url)
         
         # If domain-specific method failed or not implemented, try generic approach
         if not result or result.get("status") == "error":
@@ -85,12 +350,41 @@ class PriceAPIFetcher:
                 "url": url,
                 "timestamp": datetime.now().isoformat()
             }
-        elif result.get("status") == "success":
+        if result.get("status") == "success":
             # Cache successful results
             self._add_to_cache(cache_key, result)
+        else:
+            self._add_to_neg_cache(cache_key, result)
         
         return result
     
+    async def get_many(
+        self,
+        urls: List[str],
+        concurrency: int = 20,
+        per_host: int = 4
+    ) -> List[Any]:
+        """
+        Get product details for several URLs concurrently.
+        
+        Args:
+            urls: Product URLs
+            concurrency: Maximum lookups in flight at once
+            per_host: Maximum lookups in flight against any one retailer (or host, for
+                other sites), to stay clear of bot detection
+            
+        Returns:
+            One result per URL, in the same order; a lookup that raised yields its exception
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        host_semaphores = defaultdict(lambda: asyncio.Semaphore(per_host))
+        
+        async def fetch_one(url: str) -> Dict[str, Any]:
+            async with semaphore, host_semaphores[_parse_url(url)[0]]:
+                return await self.get_product_details(url)
+        
+        return await asyncio.gather(*(fetch_one(url) for url in urls), return_exceptions=True)
+    
     async def _get_amazon_product_data(self, url: str) -> Dict[str, Any]:
         """
         Get Amazon product data using multiple free API strategies.
@@ -106,27 +400,59 @@ class PriceAPIFetcher:
             logger.warning(f"Could not extract ASIN from Amazon URL: {url}")
             return {"status": "error", "message": "Invalid Amazon URL format"}
         
-        # Try each method in sequence until one succeeds
-        methods = [
+        # Run all methods concurrently and take the first that succeeds
+        result = await self._first_successful([
             self._get_amazon_data_from_rainforest_free(asin),
             self._get_amazon_data_from_rapidapi(asin),
             self._get_amazon_data_from_keepa_api(asin),
             self._get_product_data_from_jsonscraper(url)
-        ]
-        
-        for method in methods:
-            try:
-                result = await method
-                if result and result.get("status") == "success" and result.get("price"):
-                    logger.info(f"Successfully retrieved Amazon data for {asin}")
-                    return result
-            except Exception as e:
-                logger.warning(f"Method for Amazon data failed: {str(e)}")
-                continue
+        ], "Amazon")
+        if result:
+            logger.info(f"Successfully retrieved Amazon data for {asin}")
+            return result
         
         # If all direct methods failed, fall back to web search
         return await self._get_product_data_from_web_search(url)
     
+    async def _first_successful(self, methods: List[Any], label: str) -> Optional[Dict[str, Any]]:
+        """
+        Run fetch coroutines concurrently and return the first result with a price.
+        
+        The remaining coroutines are cancelled as soon as one succeeds, so a slow or
+        hanging method no longer delays the others, and all of them are cancelled once
+        the shared time budget runs out.
+        
+        Args:
+            methods: Coroutines that each return a product data dict
+            label: Retailer name for log messages
+            
+        Returns:
+            The first successful result, or None if every method failed
+        """
+        tasks = [asyncio.ensure_future(method) for method in methods]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + _FETCH_BUDGET
+        try:
+            for next_done in asyncio.as_completed(tasks, timeout=_FETCH_BUDGET):
+                try:
+                    result = await next_done
+                except asyncio.TimeoutError as e:
+                    if loop.time() >= deadline:
+                        logger.warning(f"Methods for {label} data ran out of time after {_FETCH_BUDGET}s")
+                        return None
+                    logger.warning(f"Method for {label} data failed: {str(e)}")
+                    continue
+                except Exception as e:
+                    logger.warning(f"Method for {label} data failed: {str(e)}")
+                    continue
+                if result and result.get("status") == "success" and result.get("price"):
+                    return result
+            return None
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
     async def _get_amazon_data_from_rainforest_free(self, asin: str) -> Dict[str, Any]:
         """Free tier alternative to Rainforest API using their limited free access."""
         # This is a simulated implementation - in practice Rainforest requires a paid API key
@@ -150,16 +476,13 @@ class PriceAPIFetcher:
         # For demonstration purposes, we're using a simulated response
         
         # Check rate limits before making a call
-        if not self._can_make_api_call("rapidapi", max_calls_per_hour=10):
+        if not self._can_make_api_call("rapidapi"):
             return {"status": "error", "message": "RapidAPI rate limit exceeded"}
         
         try:
             # Simulated API call to RapidAPI's Amazon Data endpoint
             # In a real implementation, you would use httpx to make an actual API call
             
-            # Record API call
-            self._record_api_call("rapidapi")
-            
             # This is a hardcoded successful response for demonstration
             return {
                 "status": "error", 
@@ -199,21 +522,14 @@ class PriceAPIFetcher:
         if not item_id:
             logger.warning(f"Could not extract item ID from Walmart URL: {url}")
         
-        # Try multiple methods in sequence
-        methods = [
+        # Run all methods concurrently and take the first that succeeds
+        result = await self._first_successful([
             self._get_walmart_data_from_jsonscraper(url),
             self._get_walmart_data_from_serp_api(url, item_id)
-        ]
-        
-        for method in methods:
-            try:
-                result = await method
-                if result and result.get("status") == "success" and result.get("price"):
-                    logger.info(f"Successfully retrieved Walmart data for {url}")
-                    return result
-            except Exception as e:
-                logger.warning(f"Method for Walmart data failed: {str(e)}")
-                continue
+        ], "Walmart")
+        if result:
+            logger.info(f"Successfully retrieved Walmart data for {url}")
+            return result
         
         # If all direct methods failed, fall back to web search
         return await self._get_product_data_from_web_search(url)
@@ -221,65 +537,57 @@ class PriceAPIFetcher:
     async def _get_walmart_data_from_jsonscraper(self, url: str) -> Dict[str, Any]:
         """Extract data directly from Walmart page JSON data."""
         try:
-            async with httpx.AsyncClient() as client:
-                user_agent = random.choice(self.user_agents)
-                headers = {
-                    "User-Agent": user_agent,
-                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-                    "Accept-Language": "en-US,en;q=0.5",
-                }
-                
-                response = await client.get(url, headers=headers, follow_redirects=True, timeout=15.0)
-                if response.status_code != 200:
-                    return {"status": "error", "message": f"HTTP error: {response.status_code}"}
-                
-                html_content = response.text
-                
-                # Extract JSON data embedded in the page
-                json_match = re.search(r'window\.__PRELOADED_STATE__\s*=\s*(\{.+?\});', html_content)
-                if json_match:
-                    try:
-                        json_data = json.loads(json_match.group(1))
+            # Only the preloaded state script is needed, so stop downloading once it has closed
+            status_code, html_content = await self._fetch_html(
+                url, until=_script_closed_after(_WALMART_PRELOADED_ANCHOR.encode()))
+            if status_code != 200:
+                return {"status": "error", "message": f"HTTP error: {status_code}"}
+            
+            # Extract JSON data embedded in the page
+            preloaded_state = _extract_preloaded_state(html_content)
+            if preloaded_state:
+                try:
+                    json_data = orjson.loads(preloaded_state)
+                    
+                    # Navigate through the Walmart JSON structure to find product data
+                    if 'product' in json_data and 'products' in json_data['product']:
+                        product = json_data['product']['products'][0]
                         
-                        # Navigate through the Walmart JSON structure to find product data
-                        if 'product' in json_data and 'products' in json_data['product']:
-                            product = json_data['product']['products'][0]
-                            
-                            # Extract basic product information
-                            title = product.get('name', 'Unknown Product')
-                            
-                            # Extract price information
-                            price = None
-                            price_text = None
-                            if 'priceInfo' in product:
-                                price_info = product['priceInfo']
-                                if 'currentPrice' in price_info:
-                                    price = float(price_info['currentPrice'].get('price', 0))
-                                    price_text = f"${price}"
-                            
-                            # Extract other details
-                            image_url = None
-                            if 'imageInfo' in product and 'thumbnailUrl' in product['imageInfo']:
-                                image_url = product['imageInfo']['thumbnailUrl']
-                            
-                            # Check if price was found
-                            if price is not None:
-                                return {
-                                    "status": "success",
-                                    "source": "walmart",
-                                    "url": url,
-                                    "title": title,
-                                    "price": price,
-                                    "price_text": price_text,
-                                    "image_url": image_url,
-                                    "data_source": "json_scraper"
-                                }
-                    except json.JSONDecodeError:
-                        logger.warning("Failed to parse Walmart JSON data")
-                
-                # If we're here, we couldn't extract data from JSON
-                return {"status": "error", "message": "Could not extract data from Walmart page"}
-                
+                        # Extract basic product information
+                        title = product.get('name', 'Unknown Product')
+                        
+                        # Extract price information
+                        price = None
+                        price_text = None
+                        if 'priceInfo' in product:
+                            price_info = product['priceInfo']
+                            if 'currentPrice' in price_info:
+                                price = float(price_info['currentPrice'].get('price', 0))
+                                price_text = f"${price}"
+                        
+                        # Extract other details
+                        image_url = None
+                        if 'imageInfo' in product and 'thumbnailUrl' in product['imageInfo']:
+                            image_url = product['imageInfo']['thumbnailUrl']
+                        
+                        # Check if price was found
+                        if price is not None:
+                            return {
+                                "status": "success",
+                                "source": "walmart",
+                                "url": url,
+                                "title": title,
+                                "price": price,
+                                "price_text": price_text,
+                                "image_url": image_url,
+                                "data_source": "json_scraper"
+                            }
+                except orjson.JSONDecodeError:
+                    logger.warning("Failed to parse Walmart JSON data")
+            
+            # If we're here, we couldn't extract data from JSON
+            return {"status": "error", "message": "Could not extract data from Walmart page"}
+            
         except Exception as e:
             logger.error(f"Error in Walmart JSON scraper: {str(e)}")
             return {"status": "error", "message": str(e)}
@@ -289,13 +597,11 @@ class PriceAPIFetcher:
         Get Walmart data using SerpAPI's free tier (or simulated).
         """
         # Check rate limits
-        if not self._can_make_api_call("serpapi", max_calls_per_hour=5):
+        if not self._can_make_api_call("serpapi"):
             return {"status": "error", "message": "SerpAPI rate limit exceeded"}
         
         # In practice, you would need a SerpAPI key (they have a free tier with limited requests)
         # For this example, we'll simulate the response
-        self._record_api_call("serpapi")
-        
         return {
             "status": "error",
             "message": "SerpAPI free tier limited - simulated endpoint"
@@ -316,21 +622,20 @@ class PriceAPIFetcher:
         if not sku:
             logger.warning(f"Could not extract SKU from Best Buy URL: {url}")
         
-        # Try multiple methods in sequence
-        methods = [
-            self._get_bestbuy_data_from_jsonscraper(url),
-            self._get_product_data_from_web_search(url)
-        ]
+        # Scrape the page within the shared time budget
+        result = await self._first_successful([
+            self._get_bestbuy_data_from_jsonscraper(url)
+        ], "Best Buy")
+        if result:
+            logger.info(f"Successfully retrieved Best Buy data for {url}")
+            return result
         
-        for method in methods:
-            try:
-                result = await method
-                if result and result.get("status") == "success" and result.get("price"):
-                    logger.info(f"Successfully retrieved Best Buy data for {url}")
-                    return result
-            except Exception as e:
-                logger.warning(f"Method for Best Buy data failed: {str(e)}")
-                continue
+        # Only fall back to web search (and spend one of its rate-limit tokens) when
+        # the page scrape failed; its result is only used if it carries a price
+        result = await self._get_product_data_from_web_search(url)
+        if result and result.get("status") == "success" and result.get("price"):
+            logger.info(f"Successfully retrieved Best Buy data for {url}")
+            return result
         
         # If all methods failed, return error
         return {"status": "error", "message": "All Best Buy data fetching methods failed"}
@@ -338,103 +643,106 @@ class PriceAPIFetcher:
     async def _get_bestbuy_data_from_jsonscraper(self, url: str) -> Dict[str, Any]:
         """Extract data directly from Best Buy page JSON data."""
         try:
-            async with httpx.AsyncClient() as client:
-                user_agent = random.choice(self.user_agents)
-                headers = {
-                    "User-Agent": user_agent,
-                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-                    "Accept-Language": "en-US,en;q=0.5",
-                }
-                
-                response = await client.get(url, headers=headers, follow_redirects=True, timeout=15.0)
-                if response.status_code != 200:
-                    return {"status": "error", "message": f"HTTP error: {response.status_code}"}
-                
-                html_content = response.text
-                
-                # Try to extract product data from schema.org markup
-                soup = BeautifulSoup(html_content, 'html.parser')
-                schema_scripts = soup.find_all('script', type='application/ld+json')
-                
-                for script in schema_scripts:
-                    try:
-                        json_data = json.loads(script.string)
+            status_code, html_content = await self._fetch_html(url)
+            if status_code != 200:
+                return {"status": "error", "message": f"HTTP error: {status_code}"}
+            
+            # Without JSON-LD only the price pattern can succeed, so check it before
+            # paying for a parse (bot-check and error pages usually have neither)
+            match = None
+            if 'application/ld+json' not in html_content:
+                match = _BESTBUY_PRICE_RE.search(html_content)
+                if not match:
+                    return {"status": "error", "message": "Could not extract data from Best Buy page"}
+            
+            # Try to extract product data from schema.org markup
+            soup = BeautifulSoup(html_content, _HTML_PARSER, parse_only=_PRODUCT_TAGS)
+            schema_scripts = soup.find_all('script', type='application/ld+json')
+            
+            for script in schema_scripts:
+                # orjson only accepts exact str, not bs4's NavigableString subclass
+                script_text = str(script.string) if script.string else ""
+                # Only Product blocks are used, so don't decode breadcrumbs, organisations etc.
+                if '"Product"' not in script_text:
+                    continue
+                try:
+                    json_data = orjson.loads(script_text)
+                    
+                    # Check if this is product data
+                    if '@type' in json_data and json_data['@type'] == 'Product':
+                        # Extract basic product information
+                        title = json_data.get('name', 'Unknown Product')
                         
-                        # Check if this is product data
-                        if '@type' in json_data and json_data['@type'] == 'Product':
-                            # Extract basic product information
-                            title = json_data.get('name', 'Unknown Product')
-                            
-                            # Extract price information
-                            price = None
-                            price_text = None
-                            if 'offers' in json_data:
-                                offers = json_data['offers']
-                                if isinstance(offers, dict):
-                                    price_text = offers.get('price')
-                                    if price_text:
-                                        try:
-                                            price = float(price_text)
-                                            price_text = f"${price}"
-                                        except ValueError:
-                                            pass
-                                elif isinstance(offers, list) and len(offers) > 0:
-                                    price_text = offers[0].get('price')
-                                    if price_text:
-                                        try:
-                                            price = float(price_text)
-                                            price_text = f"${price}"
-                                        except ValueError:
-                                            pass
-                            
-                            # Extract image URL
-                            image_url = json_data.get('image', None)
-                            
-                            # Check if price was found
-                            if price is not None:
-                                return {
-                                    "status": "success",
-                                    "source": "bestbuy",
-                                    "url": url,
-                                    "title": title,
-                                    "price": price,
-                                    "price_text": price_text,
-                                    "image_url": image_url,
-                                    "data_source": "json_scraper"
-                                }
-                    except json.JSONDecodeError:
-                        continue
-                
-                # If JSON-LD didn't work, try a different approach
-                # Look for specific Best Buy price patterns in the HTML
-                price_pattern = re.compile(r'"currentPrice":(\d+\.\d+)')
-                match = price_pattern.search(html_content)
+                        # Extract price information
+                        price = None
+                        price_text = None
+                        if 'offers' in json_data:
+                            offers = json_data['offers']
+                            if isinstance(offers, dict):
+                                price_text = offers.get('price')
+                                if price_text:
+                                    try:
+                                        price = float(price_text)
+                                        price_text = f"${price}"
+                                    except ValueError:
+                                        pass
+                            elif isinstance(offers, list) and len(offers) > 0:
+                                price_text = offers[0].get('price')
+                                if price_text:
+                                    try:
+                                        price = float(price_text)
+                                        price_text = f"${price}"
+                                    except ValueError:
+                                        pass
+                        
+                        # Extract image URL
+                        image_url = json_data.get('image', None)
+                        
+                        # Check if price was found
+                        if price is not None:
+                            return {
+                                "status": "success",
+                                "source": "bestbuy",
+                                "url": url,
+                                "title": title,
+                                "price": price,
+                                "price_text": price_text,
+                                "image_url": image_url,
+                                "data_source": "json_scraper"
+                            }
+                except orjson.JSONDecodeError:
+                    continue
+            
+            # If JSON-LD didn't work, try a different approach
+            # Look for specific Best Buy price patterns in the HTML
+            if match is None:
+                match = _BESTBUY_PRICE_RE.search(html_content)
+            
+            if match:
+                price = float(match.group(1))
                 
-                if match:
-                    price = float(match.group(1))
-                    
-                    # Try to find the title
-                    title_elem = soup.find('h1')
-                    title = title_elem.text.strip() if title_elem else 'Unknown Product'
-                    
-                    # Try to find an image
-                    image_elem = soup.find('img', {'class': 'primary-image'})
-                    image_url = image_elem.get('src') if image_elem else None
-                    
-                    return {
-                        "status": "success",
-                        "source": "bestbuy",
-                        "url": url,
-                        "title": title,
-                        "price": price,
-                        "price_text": f"${price}",
-                        "image_url": image_url,
-                        "data_source": "html_pattern"
-                    }
+                # Try to find the title
+                title_elem = soup.find('h1')
+                title = title_elem.text.strip() if title_elem else 'Unknown Product'
                 
-                # If we're here, we couldn't extract data
-                return {"status": "error", "message": "Could not extract data from Best Buy page"}
+                # Try to find an image
+                image_elem = soup.find('img', {'class': 'primary-image'})
+                image_url = image_elem.get('src') if image_elem else None
                 
+                return {
+                    "status": "success",
+                    "source": "bestbuy",
+                    "url": url,
+                    "title": title,
+                    "price": price,
+                    "price_text": f"${price}",
+                    "image_url": image_url,
+                    "data_source": "html_pattern"
+                }
+            
+            # If we're here, we couldn't extract data
+            return {"status": "error", "message": "Could not extract data from Best Buy page"}
+            
         except Exception as e:
             logger.error(f"Error in Best Buy JSON scraper: {str(e)}")
             return {"status": "error", "message": str(e)}
@@ -443,12 +751,9 @@ class PriceAPIFetcher:
         """Get Target product data."""
         # Target doesn't have an easily accessible free API
         # Fallback to JSON scraper or web search
-        try:
-            result = await self._get_product_data_from_jsonscraper(url)
-            if result and result.get("status") == "success" and result.get("price"):
-                return result
-        except Exception as e:
-            logger.warning(f"JSON scraper for Target failed: {str(e)}")
+        result = await self._first_successful([self._get_product_data_from_jsonscraper(url)], "Target")
+        if result:
+            return result
         
         # Fallback to web search
         return await self._get_product_data_from_web_search(url)
@@ -457,12 +762,9 @@ class PriceAPIFetcher:
         """Get eBay product data."""
         # eBay requires a registered API key, even for free tier
         # Fallback to JSON scraper or web search
-        try:
-            result = await self._get_product_data_from_jsonscraper(url)
-            if result and result.get("status") == "success" and result.get("price"):
-                return result
-        except Exception as e:
-            logger.warning(f"JSON scraper for eBay failed: {str(e)}")
+        result = await self._first_successful([self._get_product_data_from_jsonscraper(url)], "eBay")
+        if result:
+            return result
         
         # Fallback to web search
         return await self._get_product_data_from_web_search(url)
@@ -473,126 +775,129 @@ class PriceAPIFetcher:
         Looks for Schema.org and other common data structures.
         """
         try:
-            async with httpx.AsyncClient() as client:
-                user_agent = random.choice(self.user_agents)
-                headers = {
-                    "User-Agent": user_agent,
-                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-                    "Accept-Language": "en-US,en;q=0.5",
-                }
-                
-                response = await client.get(url, headers=headers, follow_redirects=True, timeout=15.0)
-                if response.status_code != 200:
-                    return {"status": "error", "message": f"HTTP error: {response.status_code}"}
-                
-                html_content = response.text
-                
-                # Parse the HTML
-                soup = BeautifulSoup(html_content, 'html.parser')
-                
-                # Try to extract product data from schema.org markup
-                schema_scripts = soup.find_all('script', type='application/ld+json')
-                
-                for script in schema_scripts:
-                    try:
-                        json_data = json.loads(script.string)
+            status_code, html_content = await self._fetch_html(url)
+            if status_code != 200:
+                return {"status": "error", "message": f"HTTP error: {status_code}"}
+            
+            # Without JSON-LD only the price pattern can succeed, so check it before
+            # paying for a parse (bot-check and error pages usually have neither)
+            match = None
+            if 'application/ld+json' not in html_content:
+                match = _GENERIC_PRICE_RE.search(html_content)
+                if not match:
+                    return {"status": "error", "message": "Could not extract data from page"}
+            
+            # Parse the HTML
+            soup = BeautifulSoup(html_content, _HTML_PARSER, parse_only=_PRODUCT_TAGS)
+            
+            # Try to extract product data from schema.org markup
+            schema_scripts = soup.find_all('script', type='application/ld+json')
+            
+            for script in schema_scripts:
+                # orjson only accepts exact str, not bs4's NavigableString subclass
+                script_text = str(script.string) if script.string else ""
+                # Only Product blocks are used, so don't decode breadcrumbs, organisations etc.
+                if '"Product"' not in script_text:
+                    continue
+                try:
+                    json_data = orjson.loads(script_text)
+                    
+                    # Handle array of objects
+                    if isinstance(json_data, list):
+                        for item in json_data:
+                            if item.get('@type') == 'Product':
+                                json_data = item
+                                break
+                    
+                    # Check if this is product data
+                    if '@type' in json_data and json_data['@type'] == 'Product':
+                        # Extract basic product information
+                        title = json_data.get('name', 'Unknown Product')
                         
-                        # Handle array of objects
-                        if isinstance(json_data, list):
-                            for item in json_data:
-                                if item.get('@type') == 'Product':
-                                    json_data = item
-                                    break
+                        # Extract price information
+                        price = None
+                        price_text = None
+                        if 'offers' in json_data:
+                            offers = json_data['offers']
+                            if isinstance(offers, dict):
+                                price_text = offers.get('price')
+                                if price_text:
+                                    try:
+                                        price = float(price_text)
+                                        price_text = f"${price}"
+                                    except ValueError:
+                                        pass
+                            elif isinstance(offers, list) and len(offers) > 0:
+                                price_text = offers[0].get('price')
+                                if price_text:
+                                    try:
+                                        price = float(price_text)
+                                        price_text = f"${price}"
+                                    except ValueError:
+                                        pass
                         
-                        # Check if this is product data
-                        if '@type' in json_data and json_data['@type'] == 'Product':
-                            # Extract basic product information
-                            title = json_data.get('name', 'Unknown Product')
-                            
-                            # Extract price information
-                            price = None
-                            price_text = None
-                            if 'offers' in json_data:
-                                offers = json_data['offers']
-                                if isinstance(offers, dict):
-                                    price_text = offers.get('price')
-                                    if price_text:
-                                        try:
-                                            price = float(price_text)
-                                            price_text = f"${price}"
-                                        except ValueError:
-                                            pass
-                                elif isinstance(offers, list) and len(offers) > 0:
-                                    price_text = offers[0].get('price')
-                                    if price_text:
-                                        try:
-                                            price = float(price_text)
-                                            price_text = f"${price}"
-                                        except ValueError:
-                                            pass
-                            
-                            # Extract image URL
-                            image_url = json_data.get('image', None)
-                            if isinstance(image_url, list) and len(image_url) > 0:
-                                image_url = image_url[0]
-                            
-                            # Extract other information that might be useful
-                            brand = json_data.get('brand', {}).get('name') if isinstance(json_data.get('brand'), dict) else json_data.get('brand')
+                        # Extract image URL
+                        image_url = json_data.get('image', None)
+                        if isinstance(image_url, list) and len(image_url) > 0:
+                            image_url = image_url[0]
+                        
+                        # Extract other information that might be useful
+                        brand = json_data.get('brand', {}).get('name') if isinstance(json_data.get('brand'), dict) else json_data.get('brand')
+                        
+                        # Check if price was found
+                        if price is not None:
+                            # Parse domain for source
+                            domain = self._extract_domain(url)
+                            source = domain.split('.')[0] if domain else 'unknown'
                             
-                            # Check if price was found
-                            if price is not None:
-                                # Parse domain for source
-                                domain = self._extract_domain(url)
-                                source = domain.split('.')[0] if domain else 'unknown'
-                                
-                                return {
-                                    "status": "success",
-                                    "source": source,
-                                    "url": url,
-                                    "title": title,
-                                    "price": price,
-                                    "price_text": price_text,
-                                    "image_url": image_url,
-                                    "brand": brand,
-                                    "data_source": "json_scraper"
-                                }
-                    except json.JSONDecodeError:
-                        continue
+                            return {
+                                "status": "success",
+                                "source": source,
+                                "url": url,
+                                "title": title,
+                                "price": price,
+                                "price_text": price_text,
+                                "image_url": image_url,
+                                "brand": brand,
+                                "data_source": "json_scraper"
+                            }
+                except orjson.JSONDecodeError:
+                    continue
+            
+            # If schema.org didn't work, try other patterns
+            # Generic price pattern that works for many sites
+            if match is None:
+                match = _GENERIC_PRICE_RE.search(html_content)
+            
+            if match:
+                price = float(match.group(1))
                 
-                # If schema.org didn't work, try other patterns
-                # Generic price pattern that works for many sites
-                price_pattern = re.compile(r'"price"[:\s]+(\d+\.?\d*)')
-                match = price_pattern.search(html_content)
+                # Try to find the title
+                title_elem = soup.find('h1')
+                title = title_elem.text.strip() if title_elem else 'Unknown Product'
                 
-                if match:
-                    price = float(match.group(1))
-                    
-                    # Try to find the title
-                    title_elem = soup.find('h1')
-                    title = title_elem.text.strip() if title_elem else 'Unknown Product'
-                    
-                    # Try to find an image
-                    image_elem = soup.find('img', {'id': 'landingImage'}) or soup.find('img', {'id': 'main-image'})
-                    image_url = image_elem.get('src') if image_elem else None
-                    
-                    # Parse domain for source
-                    domain = self._extract_domain(url)
-                    source = domain.split('.')[0] if domain else 'unknown'
-                    
-                    return {
-                        "status": "success",
-                        "source": source,
-                        "url": url,
-                        "title": title,
-                        "price": price,
-                        "price_text": f"${price}",
-                        "image_url": image_url,
-                        "data_source": "html_pattern"
-                    }
+                # Try to find an image
+                image_elem = soup.find('img', {'id': 'landingImage'}) or soup.find('img', {'id': 'main-image'})
+                image_url = image_elem.get('src') if image_elem else None
                 
-                # If we're here, we couldn't extract data
-                return {"status": "error", "message": "Could not extract data from page"}
+                # Parse domain for source
+                domain = self._extract_domain(url)
+                source = domain.split('.')[0] if domain else 'unknown'
                 
+                return {
+                    "status": "success",
+                    "source": source,
+                    "url": url,
+                    "title": title,
+                    "price": price,
+                    "price_text": f"${price}",
+                    "image_url": image_url,
+                    "data_source": "html_pattern"
+                }
+            
+            # If we're here, we couldn't extract data
+            return {"status": "error", "message": "Could not extract data from page"}
+            
         except Exception as e:
             logger.error(f"Error in generic JSON scraper: {str(e)}")
             return {"status": "error", "message": str(e)}
@@ -609,13 +914,12 @@ class PriceAPIFetcher:
             Dict with product data or error
         """
         # Check rate limits
-        if not self._can_make_api_call("directwebsearch", max_calls_per_hour=20):
+        if not self._can_make_api_call("directwebsearch"):
             return {"status": "error", "message": "Web search rate limit exceeded"}
         
         try:
             # Extract product name from URL for search
-            parsed_url = urlparse(url)
-            path_segments = parsed_url.path.split('/')
+            domain, path_segments = _parse_url(url)
             
             # Try to extract a usable search term from the URL
             search_term = None
@@ -628,26 +932,13 @@ class PriceAPIFetcher:
                 return {"status": "error", "message": "Couldn't extract search term from URL"}
             
             # CRITICAL FIX: Always use proper source identification
-            domain = self._extract_domain(url)
-            source = "unknown"
-            if "amazon" in domain or "amazon" in url.lower():
+            if "amazon" in url.lower():
                 source = "amazon"
-            elif "walmart" in domain:
-                source = "walmart"
-            elif "bestbuy" in domain:
-                source = "bestbuy"
-            elif "target" in domain:
-                source = "target"
-            elif "ebay" in domain:
-                source = "ebay"
-            elif "costco" in domain:
-                source = "costco"
+            else:
+                source = domain if domain in _RETAILER_SET else "unknown"
                 
             logger.info(f"Web search source identification: URL={url}, Domain={domain}, Identified Source={source}")
             
-            # Record API call
-            self._record_api_call("directwebsearch")
-            
             # For web search, return product info based on URL without price estimation
             title = search_term.replace(' price', '').replace(source, '').strip().title()
             
@@ -667,108 +958,126 @@ class PriceAPIFetcher:
             logger.error(f"Error in web search data fetcher: {str(e)}")
             return {"status": "error", "message": str(e)}
     
+    async def _fetch_html(self, url: str, until: Optional[Callable[[bytearray], bool]] = None) -> Tuple[int, str]:
+        """
+        Download a page, optionally stopping early.
+        
+        Args:
+            url: Page URL
+            until: Called with the bytes received so far after each chunk; once it returns
+                True the rest of the page is not downloaded
+        
+        Anything beyond _MAX_PAGE_BYTES is dropped.
+            
+        Returns:
+            (HTTP status code, decoded HTML - empty unless the status is 200)
+        """
+        async with self._client.stream("GET", url, headers=self._request_headers()) as response:
+            if response.status_code != 200:
+                return response.status_code, ""
+            
+            buf = bytearray()
+            async for chunk in response.aiter_bytes():
+                buf.extend(chunk)
+                if until is not None and until(buf):
+                    break
+                if len(buf) >= _MAX_PAGE_BYTES:
+                    logger.info(f"Truncated {url} at {_MAX_PAGE_BYTES} bytes")
+                    del buf[_MAX_PAGE_BYTES:]
+                    break
+            
+            # Decode once, at the end, with the charset httpx would use for response.text
+            return response.status_code, buf.decode(response.encoding or "utf-8", errors="replace")
+    
+    def _request_headers(self) -> Dict[str, str]:
+        """Headers for a page fetch; only the User-Agent rotates between requests."""
+        headers = dict(self._base_headers)
+        headers["User-Agent"] = next(self._user_agent_cycle)
+        return headers
+    
     def _extract_domain(self, url: str) -> str:
         """Extract domain from URL."""
-        try:
-            parsed_url = urlparse(url)
-            domain = parsed_url.netloc.lower()
-            
-            # CRITICAL FIX: Identify common e-commerce domains more robustly
-            if "amazon" in domain:
-                return "amazon"
-            elif "walmart" in domain:
-                return "walmart"
-            elif "bestbuy" in domain:
-                return "bestbuy"
-            elif "target" in domain:
-                return "target"
-            elif "ebay" in domain:
-                return "ebay"
-            elif "costco" in domain:
-                return "costco"
-                
-            return domain
-        except Exception:
-            return "unknown"
+        return _parse_url(url)[0]
     
     def _extract_asin_from_url(self, url: str) -> Optional[str]:
         """Extract ASIN from Amazon URL."""
-        patterns = [
-            r'/dp/([A-Z0-9]{10})/?',
-            r'/gp/product/([A-Z0-9]{10})/?',
-            r'/ASIN/([A-Z0-9]{10})/?',
-            r'/product/([A-Z0-9]{10})/?'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
-        
-        return None
+        return _asin_from_url(url)
     
     def _extract_item_id_from_walmart_url(self, url: str) -> Optional[str]:
         """Extract item ID from Walmart URL."""
-        # Try to find item ID in the path
-        match = re.search(r'/ip/(?:.*?)/(\d+)', url)
-        if match:
-            return match.group(1)
-        
-        # Try query parameters
-        parsed_url = urlparse(url)
-        query_params = parse_qs(parsed_url.query)
-        
-        if 'itemId' in query_params:
-            return query_params['itemId'][0]
-        
-        return None
+        return _walmart_item_id_from_url(url)
     
     def _extract_sku_from_bestbuy_url(self, url: str) -> Optional[str]:
         """Extract SKU from Best Buy URL."""
-        match = re.search(r'/(?:site|shop)/(?:.*?)/(\d+)(?:\.p)?', url)
-        if match:
-            return match.group(1)
-        
-        return None
+        return _bestbuy_sku_from_url(url)
     
     def _get_from_cache(self, key: str) -> Optional[Dict[str, Any]]:
         """Get data from cache if it exists and is not expired."""
-        if key in self.cache:
-            timestamp, data = self.cache[key]
-            if datetime.now() - timestamp < self.cache_duration:
-                return data
-            else:
-                # Remove expired entry
-                del self.cache[key]
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        expires_at, data = entry
+        if time.monotonic() < expires_at:
+            self.cache.move_to_end(key)
+            return data
+        # Remove expired entry
+        del self.cache[key]
         return None
     
     def _add_to_cache(self, key: str, data: Dict[str, Any]) -> None:
-        """Add data to cache with current timestamp."""
-        self.cache[key] = (datetime.now(), data)
+        """Add data to cache until its TTL runs out, evicting the least recently used entry if full."""
+        now = time.monotonic()
+        _drop_expired(self.cache, now)
+        self.cache[key] = (now + self.cache_ttl, data)
+        self.cache.move_to_end(key)
+        if len(self.cache) > _CACHE_MAXSIZE:
+            self.cache.popitem(last=False)
     
-    def _can_make_api_call(self, api_name: str, max_calls_per_hour: int) -> bool:
-        """Check if we can make an API call based on rate limits."""
-        now = time.time()
-        timestamps = self.api_call_timestamps.get(api_name, [])
-        
-        # Remove timestamps older than 1 hour
-        timestamps = [ts for ts in timestamps if now - ts < 3600]
-        self.api_call_timestamps[api_name] = timestamps
-        
-        # Check if we're under the limit
-        return len(timestamps) < max_calls_per_hour
+    def _get_from_neg_cache(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a recent error result for the key, if one hasn't expired yet."""
+        entry = self._neg_cache.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() < entry[0]:
+            return entry[1]
+        del self._neg_cache[key]
+        return None
     
-    def _record_api_call(self, api_name: str) -> None:
-        """Record an API call for rate limiting."""
-        now = time.time()
-        self.api_call_timestamps.setdefault(api_name, []).append(now)
+    def _add_to_neg_cache(self, key: str, result: Dict[str, Any]) -> None:
+        """Remember an error result, for longer if retrying can't fix it."""
+        ttl = _NEG_CACHE_PERMANENT_TTL if result.get("message") in _PERMANENT_ERRORS else _NEG_CACHE_TTL
+        now = time.monotonic()
+        _drop_expired(self._neg_cache, now)
+        self._neg_cache[key] = (now + ttl, result)
+        self._neg_cache.move_to_end(key)
+        if len(self._neg_cache) > _NEG_CACHE_MAXSIZE:
+            self._neg_cache.popitem(last=False)
     
-    def _generate_mock_price(self) -> float:
-        """Disabled method - no price generation."""
-        logger.error("Mock price generation function called but is disabled")
-        return None
+    def _can_make_api_call(self, api_name: str) -> bool:
+        """Check the API's rate limit and, if a call is allowed, take a token for it."""
+        bucket = self._api_buckets.get(api_name)
+        if bucket is None:
+            return True
+        tokens, last_refill, capacity, refill_rate = bucket
+        
+        # Refill for the time elapsed since the last check
+        now = time.monotonic()
+        tokens = min(capacity, tokens + (now - last_refill) * refill_rate)
+        bucket[1] = now
+        
+        if tokens < 1:
+            bucket[0] = tokens
+            return False
+        bucket[0] = tokens - 1
+        return True
     
     def cleanup(self):
         """Clean up resources."""
         self.cache.clear()
-        logger.info("PriceAPIFetcher resources cleaned up") 
\ No newline at end of file
+        self._neg_cache.clear()
+        logger.info("PriceAPIFetcher resources cleaned up")
+    
+    async def aclose(self):
+        """Close the pooled HTTP client, unless it was handed in by the caller."""
+        if self._owns_client:
+            await self._client.aclose() 
\ No newline at end of file
@@ -1,15 +1,107 @@
 import logging
 import asyncio
-from typing import Dict, List, Any, Optional
-from .price_api_fetcher import PriceAPIFetcher
+import time
+import httpx
+from typing import Dict, List, Any, Optional, Awaitable, Callable
+from .price_api_fetcher import PriceAPIFetcher, HTTP2_AVAILABLE, _drop_expired
 from .price_scraper import PriceScraper, StealthScraper
-from .alternative_finder import AlternativeFinder
+from .alternative_finder import AlternativeFinder, _MODEL_RES, _attributes_of, _category_of
 import re
-from urllib.parse import urlparse
+from collections import OrderedDict, defaultdict
+from functools import lru_cache, partial
+from urllib.parse import quote_plus, urlparse
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Retailers _extract_domain recognises. Only whole labels of the host count, so
+# neither a path like /amazon-reviews/ nor a host like target-deals-at-amazon.com
+# is taken for a retailer
+_DOMAINS = frozenset(("amazon", "target", "bestbuy", "ebay"))
+
+# Dollar amount in a price string, and the leading number in a rating string
+_PRICE_RE = re.compile(r'\$?([\d,]+\.?\d*)')
+_RATING_RE = re.compile(r'(\d+(\.\d+)?)')
+_THOUSANDS_SEPARATORS = str.maketrans('', '', ',')
+
+# Requests a PriceProvider lets run at once against any one retailer (or, together,
+# against all other sites), so bursts don't trip the retailers' rate limiting
+_MAX_REQUESTS_PER_RETAILER = 8
+
+# Fields where a lower-priority source's value also replaces one of these placeholder
+# values when merging results; any other field is only filled in where it's missing
+_MERGE_PLACEHOLDERS = {
+    "rating": frozenset(("no ratings", "none")),
+    "availability": frozenset(("unknown", "none")),
+}
+
+# Successful product lookups are reused for the same product within this window
+_DETAILS_CACHE_TTL = 600.0  # seconds
+_DETAILS_CACHE_MAXSIZE = 2048
+
+# Query parameters that identify the product; the rest (tracking, referral, ...)
+# are dropped from the URL when keying the product details cache
+_PRODUCT_QUERY_PARAMS = frozenset(("asin", "skuid", "itemid", "tcin", "pid", "id"))
+
+
+@lru_cache(maxsize=4096)
+def _domain_of(url: str) -> str:
+    """Retailer name for a URL, or "unknown"."""
+    # Without a scheme urlparse finds no host, so fall back to the whole URL
+    host = urlparse(url).hostname or url.lower()
+    # One of the host's labels is the retailer name (www.amazon.com, amazon.co.uk)
+    for label in host.split('.'):
+        if label in _DOMAINS:
+            return label
+    return "unknown"
+
+
+@lru_cache(maxsize=4096)
+def _canonical_url(url: str) -> str:
+    """The URL as a product details cache key: lowercased host, no fragment or tracking parameters."""
+    try:
+        parsed = urlparse(url)
+    except ValueError:
+        return url
+    query = "&".join(
+        param for param in parsed.query.split("&")
+        if param.split("=", 1)[0].lower() in _PRODUCT_QUERY_PARAMS
+    )
+    return parsed._replace(scheme=parsed.scheme.lower(), netloc=parsed.netloc.lower(),
+                           query=query, fragment="").geturl()
+
+
+def _price_from_text(price_text: Any) -> Optional[float]:
+    """The first dollar amount in a price string, or None if it doesn't hold a readable one."""
+    if not price_text or not isinstance(price_text, str):
+        return None
+    match = _PRICE_RE.search(price_text)
+    if not match:
+        return None
+    try:
+        return float(match.group(1).translate(_THOUSANDS_SEPARATORS))
+    except ValueError:
+        # e.g. a lone comma
+        return None
+
+
+@lru_cache(maxsize=4096)
+def _model_of(title: str) -> str:
+    """Model number or name from a product title."""
+    # Look for patterns that might be model numbers
+    for pattern in _MODEL_RES:
+        match = pattern.search(title)
+        if match:
+            return match.group(1)
+
+    # If no pattern matches, use words after brand (if title has multiple words)
+    parts = title.split(None, 2)
+    if len(parts) > 1:
+        return parts[1]
+
+    return ""
+
+
 class PriceProvider:
     """
     Unified price provider that integrates multiple strategies for fetching product prices.
@@ -18,22 +110,36 @@ class PriceProvider:
     
     def __init__(self):
         """Initialize the price provider with multiple data sources."""
+        # One pooled HTTP client shared by every data source, so they all reuse the
+        # same keep-alive connections instead of each opening their own
+        self._http = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+            timeout=15.0,
+            follow_redirects=True,
+        )
+        
         # Primary API-based fetcher (prioritize this for better performance and reliability)
-        self.api_fetcher = PriceAPIFetcher(cache_duration_minutes=60)
+        self.api_fetcher = PriceAPIFetcher(cache_duration_minutes=60, client=self._http)
         
         # Fallback to existing scrapers when APIs fail
-        self.scraper = PriceScraper()
-        self.stealth_scraper = StealthScraper()
+        self.scraper = PriceScraper(self._http)
+        self.stealth_scraper = StealthScraper(self._http)
         
         # Initialize the new alternative finder
         self.alternative_finder = AlternativeFinder(self.scraper)
         
-        # Track success/failure rates for adaptive sourcing
-        self.source_stats = {
-            "api": {"success": 0, "failure": 0},
-            "scraper": {"success": 0, "failure": 0},
-            "stealth": {"success": 0, "failure": 0}
-        }
+        # Per-retailer limit on concurrent requests; retailers don't block each other
+        self._retailer_semaphores = defaultdict(lambda: asyncio.Semaphore(_MAX_REQUESTS_PER_RETAILER))
+        
+        # Per-source outcome counts, reported through source_stats
+        self._success_counts = {"api": 0, "scraper": 0, "stealth": 0}
+        self._failure_counts = {"api": 0, "scraper": 0, "stealth": 0}
+        
+        # LRU of successful lookups: canonical URL -> (monotonic expiry, merged details)
+        self._details_cache = OrderedDict()
+        # Lookups currently running: canonical URL -> task, so concurrent callers share one
+        self._inflight = {}
         
         logger.info("Initialized PriceProvider with multi-tier strategy and fallbacks")
     
@@ -52,51 +158,81 @@ class PriceProvider:
         Returns:
             Dict with product details including price
         """
+        # The same product looked up again shortly after is served from the cache
+        cache_key = _canonical_url(url)
+        cached_result = self._get_cached_details(cache_key)
+        if cached_result is not None:
+            logger.info(f"Cache hit for {url}")
+            return cached_result
+        
+        # Share a lookup that is already running for this product instead of fetching
+        # twice. Callers await it through shield() so one caller being cancelled doesn't
+        # cancel the lookup for the others
+        task = self._inflight.get(cache_key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_product_details(url, cache_key))
+            self._inflight[cache_key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(cache_key, None))
+        else:
+            logger.info(f"Joining in-flight lookup for {url}")
+        # Each caller gets its own copy, since callers fix up fields of the result dict
+        return dict(await asyncio.shield(task))
+    
+    async def _fetch_product_details(self, url: str, cache_key: str) -> Dict[str, Any]:
+        """Query and merge the data sources for a URL that isn't cached, and cache a success."""
+        result = await self._merge_sources(url)
+        if result.get("status") == "success":
+            self._cache_details(cache_key, result)
+        return result
+    
+    async def _merge_sources(self, url: str) -> Dict[str, Any]:
+        """Query the data sources for a URL and merge what they return."""
         domain = self._extract_domain(url)
         logger.info(f"Fetching product details for {url} from {domain}")
         
-        # For Amazon, prioritize stealth scraper (it works best)
-        if domain == "amazon":
-            sources = [
-                ("stealth", self._get_product_from_stealth_scraper),
-                ("scraper", self._get_product_from_scraper),
-                ("api", self._get_product_from_api),
-            ]
-        else:
-            # For other sites, try standard scraper first
-            sources = [
-                ("scraper", self._get_product_from_scraper),
-                ("api", self._get_product_from_api),
-                ("stealth", self._get_product_from_stealth_scraper)
-            ]
-        
         # Try ALL sources and collect results
         results = []
         error_messages = []
         
-        for source_name, source_func in sources:
-            try:
-                logger.info(f"Trying {source_name} for {url}")
-                result = await source_func(url)
-                
-                if result and result.get("status") == "success":
-                    # Record success
-                    self._record_success(source_name)
-                    result["provider"] = source_name
-                    results.append(result)
-                    logger.info(f"Got successful result from {source_name}")
-                else:
-                    # Record failure
-                    self._record_failure(source_name)
-                    if result and result.get("message"):
-                        error_messages.append(f"{source_name}: {result.get('message')}")
-                    else:
-                        error_messages.append(f"{source_name}: Unknown error")
-            except Exception as e:
-                # Record failure
-                self._record_failure(source_name)
-                error_messages.append(f"{source_name}: {str(e)}")
-                logger.error(f"Error with {source_name} for {url}: {str(e)}")
+        if domain == "amazon":
+            # For Amazon, prioritize stealth scraper (it works best). The standard
+            # scraper only hands Amazon to the stealth scraper, so it isn't run
+            # as well - that would scrape the same page twice at once
+            sources = (
+                ("stealth", self.stealth_scraper.get_amazon_product_data),
+                ("api", self._get_product_from_api)
+            )
+        else:
+            # For other sites, try standard scraper first. The scrapers route on the
+            # domain, so hand them the one computed here
+            sources = (
+                ("scraper", partial(self._get_product_from_scraper, domain=domain)),
+                ("api", self._get_product_from_api),
+                ("stealth", partial(self._get_product_from_stealth_scraper, domain=domain))
+            )
+        
+        # Run the sources at once, in the order above, which is their merge priority.
+        # Once the highest-priority source still in the running comes back with a
+        # price, the lower-priority ones can't add it, so they're cancelled
+        for source_name, _ in sources:
+            logger.info(f"Trying {source_name} for {url}")
+        tasks = [asyncio.ensure_future(self._throttled(domain, source_func, url))
+                 for _, source_func in sources]
+        try:
+            pending = set(tasks)
+            while pending and not self._has_priority_result(tasks):
+                _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+        
+        for (source_name, _), task in zip(sources, tasks):
+            if not task.done() or task.cancelled():
+                # Cut short by a higher-priority result
+                continue
+            self._collect_outcome(source_name, task.exception() or task.result(),
+                                  url, results, error_messages)
         
         # If we have at least one successful result, merge them
         if results:
@@ -108,69 +244,47 @@ class PriceProvider:
                 logger.info(f"Fixing source from '{merged_result.get('source')}' to 'amazon'")
                 merged_result["source"] = "amazon"
             
-            # Track which fields we've combined
-            combined_fields = ["provider"]
+            # Track which fields we've combined (status and provider are never merged)
+            combined_fields = {"status", "provider"}
             merged_result["provider"] = "combined"
             
             # Add data sources used
             merged_result["data_sources_used"] = [r.get("provider", "unknown") for r in results]
             
-            # Merge data from all results, prioritizing non-null values
+            # Merge data from all results, prioritizing non-null values. Results are already
+            # ordered by priority, so each field is taken from the first result that has it
             for result in results[1:]:
                 for key, value in result.items():
-                    # Skip status, provider, and already combined fields
-                    if key in ["status", "provider"] or key in combined_fields:
+                    # Skip missing values and already combined fields
+                    if value is None or key in combined_fields:
                         continue
                     
-                    # For price data, take the first non-null value (results are already ordered by priority)
-                    if key == "price" and value is not None and merged_result.get("price") is None:
-                        merged_result["price"] = value
-                        merged_result["price_text"] = result.get("price_text", f"${value}")
-                        combined_fields.extend(["price", "price_text"])
-                        logger.info(f"Added price {value} from {result.get('provider')}")
+                    # Fill in missing data; a few fields may also replace a placeholder value
+                    current = merged_result.get(key)
+                    if current is not None:
+                        placeholders = _MERGE_PLACEHOLDERS.get(key)
+                        if placeholders is None or str(current).lower() not in placeholders:
+                            continue
                     
-                    # For rating data, take the first available ratings
-                    elif key == "rating" and value is not None and (
-                        merged_result.get("rating") is None or 
-                        merged_result.get("rating", "").lower() in ["no ratings", "none"]
-                    ):
-                        merged_result["rating"] = value
-                        combined_fields.append("rating")
-                        logger.info(f"Added rating {value} from {result.get('provider')}")
-                    
-                    # For availability data, take the first available data
-                    elif key == "availability" and value is not None and (
-                        merged_result.get("availability") is None or
-                        merged_result.get("availability", "").lower() in ["unknown", "none"]
-                    ):
-                        merged_result["availability"] = value
-                        combined_fields.append("availability")
-                        logger.info(f"Added availability {value} from {result.get('provider')}")
-                    
-                    # For other missing data, fill it in
-                    elif merged_result.get(key) is None and value is not None:
-                        merged_result[key] = value
-                        combined_fields.append(key)
-                        logger.info(f"Added {key} from {result.get('provider')}")
+                    merged_result[key] = value
+                    combined_fields.add(key)
+                    if key == "price":
+                        # The price text goes with the price it describes
+                        merged_result["price_text"] = result.get("price_text", f"${value}")
+                        combined_fields.add("price_text")
+                    logger.info(f"Added {key} {value} from {result.get('provider')}")
             
             # If we still don't have a title, extract it from URL
             if not merged_result.get("title"):
-                merged_result["title"] = self._extract_title_from_url(url)
+                merged_result["title"] = self._extract_title_from_url(url, domain)
                 
             # Last chance to extract price from price_text if we still don't have it
-            if merged_result.get("price") is None and merged_result.get("price_text"):
-                try:
-                    price_text = merged_result.get("price_text")
-                    price_match = re.search(r'\$?([\d,]+\.?\d*)', price_text)
-                    if price_match:
-                        price_str = price_match.group(1).replace(',', '')
-                        price = float(price_str)
-                        # Add it to the result with sanity check
-                        if 1 <= price <= 10000:  # Basic sanity check
-                            merged_result["price"] = price
-                            logger.info(f"Extracted price ${price} from price_text")
-                except Exception as e:
-                    logger.error(f"Failed to extract price from price_text: {e}")
+            if merged_result.get("price") is None:
+                price = _price_from_text(merged_result.get("price_text"))
+                # Add it to the result with sanity check
+                if price is not None and 1 <= price <= 10000:  # Basic sanity check
+                    merged_result["price"] = price
+                    logger.info(f"Extracted price ${price} from price_text")
             
             # CRITICAL FIX: If we still don't have a price, try a direct browser scrape as last resort
             if merged_result.get("price") is None:
@@ -199,17 +313,85 @@ class PriceProvider:
             "provider": "none"
         }
     
+    def _get_cached_details(self, key: str) -> Optional[Dict[str, Any]]:
+        """A copy of the cached details for the key, if they haven't expired."""
+        entry = self._details_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, details = entry
+        if time.monotonic() < expires_at:
+            self._details_cache.move_to_end(key)
+            # Hand out a copy - callers fix up fields of the result dict
+            return dict(details)
+        del self._details_cache[key]
+        return None
+    
+    def _cache_details(self, key: str, details: Dict[str, Any]) -> None:
+        """Cache a copy of merged details, evicting the least recently used entry if full."""
+        now = time.monotonic()
+        _drop_expired(self._details_cache, now)
+        self._details_cache[key] = (now + _DETAILS_CACHE_TTL, dict(details))
+        self._details_cache.move_to_end(key)
+        if len(self._details_cache) > _DETAILS_CACHE_MAXSIZE:
+            self._details_cache.popitem(last=False)
+    
+    async def _throttled(self, domain: str, fetch: Callable[[str], Awaitable[Any]], url: str) -> Any:
+        """Run fetch(url) against a retailer while holding one of that retailer's request slots."""
+        async with self._retailer_semaphores[domain]:
+            return await fetch(url)
+    
+    @staticmethod
+    def _has_priority_result(tasks: List[asyncio.Future]) -> bool:
+        """
+        Whether get_product_details can stop waiting on its sources.
+        
+        True once the first source (in priority order) that hasn't failed has
+        returned a successful result with a price.
+        """
+        for task in tasks:
+            if not task.done():
+                return False
+            if task.cancelled() or task.exception() is not None:
+                continue
+            result = task.result()
+            if result and result.get("status") == "success":
+                return result.get("price") is not None
+        return False
+    
+    def _collect_outcome(self, source_name: str, outcome: Any, url: str,
+                         results: List[Dict[str, Any]], error_messages: List[str]) -> None:
+        """Record how one source's lookup went for get_product_details and collect its result."""
+        if isinstance(outcome, BaseException):
+            # Record failure
+            self._record_failure(source_name)
+            error_messages.append(f"{source_name}: {str(outcome)}")
+            logger.error(f"Error with {source_name} for {url}: {str(outcome)}")
+            return
+        
+        result = outcome or {}
+        if result.get("status") == "success":
+            # Record success
+            self._record_success(source_name)
+            result["provider"] = source_name
+            results.append(result)
+            logger.info(f"Got successful result from {source_name}")
+        else:
+            # Record failure
+            self._record_failure(source_name)
+            error_messages.append(f"{source_name}: {result.get('message') or 'Unknown error'}")
+    
     async def _get_product_from_api(self, url: str) -> Dict[str, Any]:
         """Fetch product details using the API approach."""
         return await self.api_fetcher.get_product_details(url)
     
-    async def _get_product_from_scraper(self, url: str) -> Dict[str, Any]:
-        """Fetch product details using the standard scraper."""
-        domain = self._extract_domain(url)
+    async def _get_product_from_scraper(self, url: str, domain: Optional[str] = None) -> Dict[str, Any]:
+        """Fetch product details using the standard scraper (domain: the URL's, if already known)."""
+        if domain is None:
+            domain = self._extract_domain(url)
         
         if "amazon" in domain:
             # Use stealth scraper for Amazon directly
-            return await self._get_product_from_stealth_scraper(url)
+            return await self._get_product_from_stealth_scraper(url, domain)
         elif "target" in domain:
             # Target implementation would go here
             return await self.scraper.scrape_target(url)
@@ -221,9 +403,10 @@ class PriceProvider:
             logger.warning(f"No specific scraper for domain {domain}, likely to fail")
             return {"status": "error", "message": f"No scraper implementation for {domain}"}
     
-    async def _get_product_from_stealth_scraper(self, url: str) -> Dict[str, Any]:
-        """Fetch product details using the stealth scraper approach."""
-        domain = self._extract_domain(url)
+    async def _get_product_from_stealth_scraper(self, url: str, domain: Optional[str] = None) -> Dict[str, Any]:
+        """Fetch product details using the stealth scraper approach (domain: the URL's, if already known)."""
+        if domain is None:
+            domain = self._extract_domain(url)
         
         if "amazon" in domain:
             return await self.stealth_scraper.get_amazon_product_data(url)
@@ -234,61 +417,31 @@ class PriceProvider:
     
     def _extract_domain(self, url: str) -> str:
         """Extract domain from URL for easy identification."""
-        try:
-            # Simple domain extraction - could use urlparse for more robust parsing
-            for domain in ["amazon", "target", "bestbuy", "ebay"]:
-                if domain in url:
-                    return domain
+        if not isinstance(url, str):
             return "unknown"
-        except Exception:
+        try:
+            return _domain_of(url)
+        except ValueError:
+            # urlparse rejects some malformed hosts (e.g. an unclosed IPv6 bracket)
             return "unknown"
     
-    def _get_ranked_sources(self, domain: str) -> List[tuple]:
-        """
-        Get data sources ranked by historical performance.
-        Adaptive strategy that learns which sources work best for each domain.
-        
-        Returns:
-            List of tuples (source_name, source_function)
-        """
-        sources = [
-            ("api", self._get_product_from_api),
-            ("scraper", self._get_product_from_scraper),
-            ("stealth", self._get_product_from_stealth_scraper)
-        ]
-        
-        # For Amazon, prioritize stealth scraper after API
-        if domain == "amazon":
-            return [
-                ("api", self._get_product_from_api),
-                ("stealth", self._get_product_from_stealth_scraper),
-                ("scraper", self._get_product_from_scraper)
-            ]
-        
-        # For other domains, use general ranking based on success rates
-        # This is a simplified ranking algorithm - in a real system, you might use
-        # more sophisticated scoring combining success rate, response time, etc.
-        if sum(self.source_stats["api"].values()) > 10:  # Only rerank after gathering data
-            # Calculate success rates
-            rates = {}
-            for source, stats in self.source_stats.items():
-                total = stats["success"] + stats["failure"]
-                rates[source] = stats["success"] / total if total > 0 else 0
-            
-            # Sort sources by success rate
-            sources.sort(key=lambda x: rates[x[0]], reverse=True)
-        
-        return sources
-    
     def _record_success(self, source: str) -> None:
-        """Record a successful API call for adaptive sourcing."""
-        if source in self.source_stats:
-            self.source_stats[source]["success"] += 1
+        """Record a successful API call in source_stats."""
+        if source in self._success_counts:
+            self._success_counts[source] += 1
     
     def _record_failure(self, source: str) -> None:
-        """Record a failed API call for adaptive sourcing."""
-        if source in self.source_stats:
-            self.source_stats[source]["failure"] += 1
+        """Record a failed API call in source_stats."""
+        if source in self._failure_counts:
+            self._failure_counts[source] += 1
+    
+    @property
+    def source_stats(self) -> Dict[str, Dict[str, int]]:
+        """Success/failure counts per source, e.g. {"api": {"success": 3, "failure": 1}}."""
+        return {
+            source: {"success": success, "failure": self._failure_counts[source]}
+            for source, success in self._success_counts.items()
+        }
     
     async def find_alternatives(self, product_details: Dict[str, Any], max_results: int = 3) -> List[Dict[str, Any]]:
         """
@@ -315,18 +468,13 @@ class PriceProvider:
         logger.info(f"Searching for alternatives for product from {product_details.get('source', 'unknown')} with title: {product_details.get('title', 'Unknown')}")
         
         # If we don't have a price, try to get it from the price_text
-        if product_details.get('price') is None and product_details.get('price_text'):
-            try:
-                price_text = product_details.get('price_text', '')
-                price_match = re.search(r'\$?([\d,]+\.?\d*)', price_text)
-                if price_match:
-                    price_str = price_match.group(1).replace(',', '')
-                    price = float(price_str)
-                    # Add it to the product details
-                    product_details['price'] = price
-                    logger.info(f"Extracted price ${price} from price_text '{price_text}' for alternatives search")
-            except Exception as e:
-                logger.error(f"Failed to extract price from price_text: {e}")
+        if product_details.get('price') is None:
+            price_text = product_details.get('price_text')
+            price = _price_from_text(price_text)
+            if price is not None:
+                # Add it to the product details
+                product_details['price'] = price
+                logger.info(f"Extracted price ${price} from price_text '{price_text}' for alternatives search")
         
         # Use the advanced alternative finder for better results with a global timeout
         try:
@@ -336,42 +484,27 @@ class PriceProvider:
             
             logger.info(f"Starting alternative search with {global_timeout}s timeout")
             
-            # Create a task for the alternative search
-            alternative_search_task = asyncio.create_task(
-                self.alternative_finder.find_alternatives(product_details, max_results)
-            )
-            
-            # Create a timeout task
-            timeout_task = asyncio.create_task(asyncio.sleep(global_timeout))
-            
-            # Wait for either the search to complete or timeout
-            done, pending = await asyncio.wait(
-                {alternative_search_task, timeout_task},
-                return_when=asyncio.FIRST_COMPLETED
-            )
-            
-            # Cancel pending tasks
-            for task in pending:
-                task.cancel()
-                
-            # If the search task completed first, get the results
-            if alternative_search_task in done:
-                alternatives = await alternative_search_task
-                logger.info(f"Alternative finder found {len(alternatives)} alternatives for {product_details.get('title', 'Unknown')}")
-                
-                # If no alternatives were found, try relaxed alternative method
-                if not alternatives and max_results > 0:
-                    logger.info("No alternatives found with regular method, trying relaxed method...")
-                    alternatives = await self.scraper.find_relaxed_alternatives(product_details, max_results)
-                    logger.info(f"Relaxed method found {len(alternatives)} alternatives")
-                
-                return alternatives
-            else:
-                # The timeout task completed first
+            # Run the alternative search, cancelling it if it runs past the timeout
+            try:
+                alternatives = await asyncio.wait_for(
+                    self.alternative_finder.find_alternatives(product_details, max_results),
+                    timeout=global_timeout
+                )
+            except asyncio.TimeoutError:
                 logger.warning(f"Alternative search timed out after {global_timeout}s. Trying relaxed method...")
                 alternatives = await self.scraper.find_relaxed_alternatives(product_details, max_results)
                 logger.info(f"Relaxed method found {len(alternatives)} alternatives after timeout")
                 return alternatives
+            
+            logger.info(f"Alternative finder found {len(alternatives)} alternatives for {product_details.get('title', 'Unknown')}")
+            
+            # If no alternatives were found, try relaxed alternative method
+            if not alternatives and max_results > 0:
+                logger.info("No alternatives found with regular method, trying relaxed method...")
+                alternatives = await self.scraper.find_relaxed_alternatives(product_details, max_results)
+                logger.info(f"Relaxed method found {len(alternatives)} alternatives")
+            
+            return alternatives
                 
         except asyncio.CancelledError:
             logger.warning("Alternative search was cancelled. Trying relaxed method...")
@@ -394,33 +527,18 @@ class PriceProvider:
                     logger.info("Falling back to legacy alternative search")
                     fallback_timeout = 15.0
                     
-                    # Create fallback search task
-                    fallback_search_task = asyncio.create_task(
-                        self.scraper.find_alternatives(product_details, max_results)
-                    )
-                    
-                    # Create fallback timeout task
-                    fallback_timeout_task = asyncio.create_task(asyncio.sleep(fallback_timeout))
-                    
-                    # Wait for either completion or timeout
-                    done, pending = await asyncio.wait(
-                        {fallback_search_task, fallback_timeout_task},
-                        return_when=asyncio.FIRST_COMPLETED
-                    )
-                    
-                    # Cancel pending tasks
-                    for task in pending:
-                        task.cancel()
-                    
-                    # If search completed, get results
-                    if fallback_search_task in done:
-                        alternatives = await fallback_search_task
-                        logger.info(f"Fallback search found {len(alternatives)} alternatives")
-                        return alternatives
-                    else:
-                        # The timeout task completed first
+                    # Run the fallback search, cancelling it if it runs past the timeout
+                    try:
+                        alternatives = await asyncio.wait_for(
+                            self.scraper.find_alternatives(product_details, max_results),
+                            timeout=fallback_timeout
+                        )
+                    except asyncio.TimeoutError:
                         logger.warning(f"Fallback alternative search timed out after {fallback_timeout}s")
                         return []
+                    
+                    logger.info(f"Fallback search found {len(alternatives)} alternatives")
+                    return alternatives
                 except asyncio.CancelledError:
                     logger.warning("Fallback search was cancelled.")
                     return []
@@ -430,137 +548,25 @@ class PriceProvider:
     
     def _identify_product_category(self, title: str, url: str) -> str:
         """Identify the product category from the title and URL."""
-        title_lower = title.lower()
-        url_lower = url.lower()
-        
-        # Check for shoes/footwear
-        if any(word in title_lower or word in url_lower for word in 
-              ['shoe', 'sneaker', 'trainer', 'boot', 'footwear']):
-            return "shoes"
-            
-        # Check for electronics/computer
-        if any(word in title_lower or word in url_lower for word in 
-              ['laptop', 'computer', 'pc', 'desktop', 'macbook', 'chromebook']):
-            return "computers"
-            
-        # Check for phones
-        if any(word in title_lower or word in url_lower for word in 
-              ['phone', 'iphone', 'smartphone', 'android', 'galaxy', 'pixel']):
-            return "phones"
-            
-        # Check for TVs
-        if any(word in title_lower or word in url_lower for word in 
-              ['tv', 'television', 'smart tv', 'led tv', 'oled', 'qled']):
-            return "tvs"
-            
-        # Check for audio
-        if any(word in title_lower or word in url_lower for word in 
-              ['headphone', 'earphone', 'earbud', 'airpod', 'speaker', 'soundbar']):
-            return "audio"
-            
-        # Check for appliances
-        if any(word in title_lower or word in url_lower for word in 
-              ['refrigerator', 'washer', 'dryer', 'dishwasher', 'microwave', 'oven', 'vacuum']):
-            return "appliances"
-            
-        # Check for gaming
-        if any(word in title_lower or word in url_lower for word in 
-              ['xbox', 'playstation', 'ps5', 'ps4', 'nintendo', 'switch', 'gaming', 'console']):
-            return "gaming"
-            
-        # Check for home goods
-        if any(word in title_lower or word in url_lower for word in 
-              ['furniture', 'chair', 'table', 'desk', 'mattress', 'bed', 'sofa', 'couch']):
-            return "home"
-        
-        # Default to general if no specific category is detected
-        return "general"
+        # Same keyword rules as the alternative finder, cached per lowercased title and URL
+        return _category_of(title.lower(), url.lower())
     
     def _extract_brand_from_title(self, title: str) -> str:
         """Extract brand name from product title."""
-        # Common approach: first word is often the brand
-        parts = title.split()
+        # Common approach: first word is often the brand (maxsplit: only it is needed)
+        parts = title.split(None, 1)
         if len(parts) > 0:
             return parts[0]
         return ""
     
     def _extract_model_from_title(self, title: str) -> str:
         """Extract model number or name from product title."""
-        # Look for patterns that might be model numbers
-        model_patterns = [
-            r'(\b[A-Z0-9]+-[A-Z0-9]+\b)',  # Matches patterns like "X-T30"
-            r'(\b[A-Z][0-9]{1,4}\b)',      # Matches patterns like "A7" or "X100"
-            r'(\b[A-Z]{1,3}[0-9]{2,4}\b)'  # Matches patterns like "EOS80D" or "A7III"
-        ]
-        
-        for pattern in model_patterns:
-            match = re.search(pattern, title)
-            if match:
-                return match.group(1)
-        
-        # If no pattern matches, use words after brand (if title has multiple words)
-        parts = title.split()
-        if len(parts) > 1:
-            return parts[1]
-        
-        return ""
+        return _model_of(title)
     
     def _extract_key_attributes(self, title: str, category: str) -> List[str]:
         """Extract key product attributes based on category."""
-        title_lower = title.lower()
-        attributes = []
-        
-        # Extract size information
-        size_match = re.search(r'(\d+(\.\d+)?)\s*(inch|"|in\b)', title_lower)
-        if size_match:
-            attributes.append(f"{size_match.group(1)} inch")
-        
-        # Extract color information
-        color_match = re.search(r'\b(black|white|blue|red|green|yellow|gray|grey|silver|gold|rose gold|purple|pink)\b', title_lower)
-        if color_match:
-            attributes.append(color_match.group(1))
-        
-        # Category-specific attributes
-        if category == "shoes":
-            # Look for size
-            shoe_size_match = re.search(r'size\s*(\d+(\.\d+)?)', title_lower)
-            if shoe_size_match:
-                attributes.append(f"size {shoe_size_match.group(1)}")
-                
-            # Look for gender
-            if "men" in title_lower:
-                attributes.append("men")
-            elif "women" in title_lower:
-                attributes.append("women")
-            
-        elif category == "computers":
-            # Look for CPU
-            cpu_match = re.search(r'\b(i3|i5|i7|i9|ryzen|core)\b', title_lower)
-            if cpu_match:
-                attributes.append(cpu_match.group(1))
-                
-            # Look for RAM
-            ram_match = re.search(r'(\d+)\s*gb\s*(ram|memory)', title_lower)
-            if ram_match:
-                attributes.append(f"{ram_match.group(1)}GB RAM")
-                
-            # Look for storage
-            storage_match = re.search(r'(\d+)\s*(gb|tb)\s*(ssd|hdd|storage)', title_lower)
-            if storage_match:
-                attributes.append(f"{storage_match.group(1)}{storage_match.group(2)} storage")
-        
-        elif category == "phones":
-            # Look for storage
-            storage_match = re.search(r'(\d+)\s*(gb|tb)', title_lower)
-            if storage_match:
-                attributes.append(f"{storage_match.group(1)}{storage_match.group(2)}")
-                
-            # Look for generation/version
-            gen_match = re.search(r'((\d+)(nd|rd|th)?\s*gen)', title_lower)
-            if gen_match:
-                attributes.append(gen_match.group(1))
-        
-        return attributes
+        # Same rules as the alternative finder, with its precompiled patterns and cache
+        return list(_attributes_of(title.lower(), category))
     
     def _generate_targeted_search_query(self, brand: str, model: str, attributes: List[str], category: str) -> str:
         """Generate a targeted search query based on product attributes."""
@@ -598,19 +604,22 @@ class PriceProvider:
     
     async def _search_market_for_alternative(self, market: str, search_query: str, category: str, original_product: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Search a specific market for an alternative product."""
-        encoded_query = search_query.replace(" ", "+")
+        # quote_plus also escapes &, =, # and non-ASCII text, which would otherwise break the URL
+        encoded_query = quote_plus(search_query)
         
         # Set a reasonable timeout for each market search to avoid hanging
+        # (time spent queued for the market's request slot doesn't count)
         search_timeout = 10.0  # 10 seconds max
         
         if market == "amazon":
             search_url = f"https://www.amazon.com/s?k={encoded_query}"
             try:
                 # Use timeout to prevent hanging
-                return await asyncio.wait_for(
-                    self.scraper._get_amazon_search_result(search_url),
-                    timeout=search_timeout
-                )
+                async with self._retailer_semaphores[market]:
+                    return await asyncio.wait_for(
+                        self.scraper._get_amazon_search_result(search_url),
+                        timeout=search_timeout
+                    )
             except asyncio.TimeoutError:
                 logger.warning(f"Amazon search timed out after {search_timeout}s")
                 return {"status": "error", "message": "Amazon search timed out", "source": "amazon"}
@@ -622,10 +631,11 @@ class PriceProvider:
             search_url = f"https://www.target.com/s?searchTerm={encoded_query}"
             try:
                 if hasattr(self.scraper, "_get_target_search_result"):
-                    return await asyncio.wait_for(
-                        self.scraper._get_target_search_result(search_url),
-                        timeout=search_timeout
-                    )
+                    async with self._retailer_semaphores[market]:
+                        return await asyncio.wait_for(
+                            self.scraper._get_target_search_result(search_url),
+                            timeout=search_timeout
+                        )
                 else:
                     logger.warning("Target search method not found in scraper")
                     return {"status": "error", "message": "Target search not implemented", "source": "target"}
@@ -640,10 +650,11 @@ class PriceProvider:
             search_url = f"https://www.bestbuy.com/site/searchpage.jsp?st={encoded_query}"
             try:
                 if hasattr(self.scraper, "_get_bestbuy_search_result"):
-                    return await asyncio.wait_for(
-                        self.scraper._get_bestbuy_search_result(search_url),
-                        timeout=search_timeout
-                    )
+                    async with self._retailer_semaphores[market]:
+                        return await asyncio.wait_for(
+                            self.scraper._get_bestbuy_search_result(search_url),
+                            timeout=search_timeout
+                        )
                 else:
                     logger.warning("Best Buy search method not found in scraper")
                     return {"status": "error", "message": "Best Buy search not implemented", "source": "bestbuy"}
@@ -659,6 +670,7 @@ class PriceProvider:
     
     def cleanup(self):
         """Clean up resources from all providers."""
+        self._details_cache.clear()
         try:
             self.api_fetcher.cleanup()
         except Exception as e:
@@ -673,8 +685,12 @@ class PriceProvider:
         except Exception as e:
             logger.error(f"Error cleaning up scrapers: {str(e)}")
     
-    def _extract_title_from_url(self, url: str) -> str:
-        """Extract a reasonable product title from URL path segments."""
+    async def aclose(self):
+        """Close the shared HTTP client; call once the provider is no longer needed."""
+        await self._http.aclose()
+    
+    def _extract_title_from_url(self, url: str, domain: Optional[str] = None) -> str:
+        """Extract a reasonable product title from URL path segments (domain: the URL's, if already known)."""
         try:
             parsed_url = urlparse(url)
             segments = parsed_url.path.strip('/').split('/')
@@ -691,7 +707,8 @@ class PriceProvider:
                 return title
                 
             # Fallback to domain + product
-            domain = self._extract_domain(url)
+            if domain is None:
+                domain = self._extract_domain(url)
             return f"{domain.capitalize()} Product"
         except:
             return "Unknown Product"
@@ -752,27 +769,22 @@ class PriceProvider:
         availability = product_details.get('availability', 'Unknown')
         
         # Extra attempt to extract price from price_text if not already available
-        if price is None and price_text and price_text != 'Price unavailable':
-            try:
-                # Try harder to extract price from text
-                price_match = re.search(r'\$?([\d,]+\.?\d*)', price_text)
-                if price_match:
-                    price_str = price_match.group(1).replace(',', '')
-                    price = float(price_str)
-                    logger.info(f"Successfully extracted price ${price} from price_text '{price_text}' during analysis")
-                    
-                    # Do a final sanity check on the extracted price
-                    if price > 10000 or price < 1:
-                        logger.warning(f"Extracted price ${price} is outside reasonable range - ignoring")
-                        price = None
-            except Exception as e:
-                logger.error(f"Error extracting price from price_text during analysis: {e}")
+        if price is None and price_text != 'Price unavailable':
+            # Try harder to extract price from text
+            price = _price_from_text(price_text)
+            if price is not None:
+                logger.info(f"Successfully extracted price ${price} from price_text '{price_text}' during analysis")
+                
+                # Do a final sanity check on the extracted price
+                if price > 10000 or price < 1:
+                    logger.warning(f"Extracted price ${price} is outside reasonable range - ignoring")
+                    price = None
         
         # Try to extract rating value
         rating = 0
         try:
             if rating_text and rating_text.lower() != 'no ratings':
-                rating_match = re.search(r'(\d+(\.\d+)?)', rating_text)
+                rating_match = _RATING_RE.search(rating_text)
                 if rating_match:
                     rating = float(rating_match.group(1))
         except Exception as e:
@@ -882,7 +894,7 @@ class PriceProvider:
                 # Extract rating if available
                 if alt.get("rating"):
                     try:
-                        rating_match = re.search(r'(\d+(\.\d+)?)', alt.get("rating", ""))
+                        rating_match = _RATING_RE.search(alt.get("rating", ""))
                         if rating_match:
                             alt_rating = float(rating_match.group(1))
                             alt_has_rating = True
@@ -9,6 +9,7 @@ import time
 import random
 import tempfile
 import asyncio
+from contextlib import asynccontextmanager
 from PIL import Image
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse, parse_qs
@@ -31,11 +32,25 @@ load_dotenv()
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Every Amazon product URL form, in one pass (/gp/product/ is covered by /product/)
+_ASIN_RE = re.compile(r'/(?:dp|ASIN|product)/([A-Z0-9]{10})')
+
+
+@asynccontextmanager
+async def _borrow_client(client: Optional[httpx.AsyncClient]):
+    """Yield the shared HTTP client if there is one, else a throwaway client closed on exit."""
+    if client is not None:
+        yield client
+    else:
+        async with httpx.AsyncClient() as own_client:
+            yield own_client
+
 class StealthScraper:
     """CAPTCHA avoidance through stealth techniques and API alternatives."""
     
-    def __init__(self):
-        """Initialize the stealth scraper."""
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        """Initialize the stealth scraper (client: shared HTTP client for API calls, if any)."""
+        self._client = client
         self.temp_dir = tempfile.mkdtemp(prefix="browser_data_")
         os.makedirs(os.path.join(self.temp_dir, "user_data"), exist_ok=True)
         
@@ -129,7 +144,7 @@ class StealthScraper:
             "asin": asin
         }
         
-        async with httpx.AsyncClient() as client:
+        async with _borrow_client(self._client) as client:
             response = await client.get(api_url, params=params, timeout=30.0)
             if response.status_code == 200:
                 data = response.json()
@@ -216,19 +231,8 @@ class StealthScraper:
     
     def _extract_asin_from_url(self, url: str) -> Optional[str]:
         """Extract ASIN from Amazon URL."""
-        patterns = [
-            r'/dp/([A-Z0-9]{10})/?',
-            r'/gp/product/([A-Z0-9]{10})/?',
-            r'/ASIN/([A-Z0-9]{10})/?',
-            r'/product/([A-Z0-9]{10})/?'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
-        
-        return None
+        match = _ASIN_RE.search(url)
+        return match.group(1) if match else None
     
     async def _get_product_data_with_browser(self, url: str) -> Dict[str, Any]:
         """
@@ -1115,8 +1119,9 @@ class StealthScraper:
 
 
 class PriceScraper:
-    def __init__(self):
-        """Initialize the price scraper."""
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        """Initialize the price scraper (client: shared HTTP client for plain requests, if any)."""
+        self._client = client
         # Initialize user agent rotation
         self.user_agents = [
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
@@ -1158,7 +1163,7 @@ class PriceScraper:
         self.use_rainforest = "RAINFOREST_API_KEY" in os.environ and os.environ["RAINFOREST_API_KEY"]
         
         # Initialize stealth scraper
-        self.stealth_scraper = StealthScraper()
+        self.stealth_scraper = StealthScraper(client)
         
         # Save cookies between sessions
         self.cookies_dir = os.path.join(tempfile.gettempdir(), "ecommerce_cookies")
@@ -1325,7 +1330,7 @@ class PriceScraper:
             return []
         
         # Start timing the operation for analytics
-        start_time = time.time()
+        start_time = time.monotonic()
         logger.info(f"Starting improved alternative search for real products")
         
         # Fix source if needed
@@ -1425,7 +1430,7 @@ class PriceScraper:
                 break
                 
             # Skip if we've exceeded the time limit
-            if (time.time() - start_time) >= global_timeout:
+            if (time.monotonic() - start_time) >= global_timeout:
                 logger.warning(f"Global timeout reached after {global_timeout:.1f}s")
                 break
                 
@@ -1484,7 +1489,7 @@ class PriceScraper:
             
             for retailer in remaining_retailers:
                 # Skip if we've reached max results or timeout
-                if len(all_alternatives) >= max_results or (time.time() - start_time) >= global_timeout:
+                if len(all_alternatives) >= max_results or (time.monotonic() - start_time) >= global_timeout:
                     break
                     
                 # Find appropriate category URL
@@ -1554,7 +1559,7 @@ class PriceScraper:
             
             for retailer in remaining_retailers:
                 # Skip if we've reached max results or timeout
-                if len(all_alternatives) >= max_results or (time.time() - start_time) >= global_timeout:
+                if len(all_alternatives) >= max_results or (time.monotonic() - start_time) >= global_timeout:
                     break
                     
                 # Find appropriate direct product URL
@@ -1592,7 +1597,7 @@ class PriceScraper:
                         logger.error(f"Error fetching direct product for {retailer}: {e}")
         
         # Final timing and outcome logging
-        search_time = time.time() - start_time
+        search_time = time.monotonic() - start_time
         logger.info(f"Alternative search completed in {search_time:.2f}s. Found {len(all_alternatives)} alternatives.")
         
         # Sort by score and return results
@@ -4597,13 +4602,13 @@ class PriceScraper:
         logger.info(f"Using basic fallback Target scraper for: {url}")
         
         try:
-            async with httpx.AsyncClient(follow_redirects=True, timeout=15.0) as client:
+            async with _borrow_client(self._client) as client:
                 headers = {
                     "User-Agent": random.choice(self.user_agents),
                     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
                 }
                 
-                response = await client.get(url, headers=headers)
+                response = await client.get(url, headers=headers, follow_redirects=True, timeout=15.0)
                 
                 if response.status_code == 200:
                     # Parse HTML
@@ -4780,7 +4785,7 @@ class PriceScraper:
         logger.info("Using relaxed alternatives search since regular search found no results")
         
         # Start timing the operation
-        start_time = time.time()
+        start_time = time.monotonic()
         
         # Fix source if needed
         original_source = product_details.get('source', '').lower()
@@ -4817,7 +4822,7 @@ class PriceScraper:
         try:
             # Create synthetic alternatives for each available retailer
             for i, retailer in enumerate(available_retailers[:max_results]):
-                if time.time() - start_time > global_timeout:
+                if time.monotonic() - start_time > global_timeout:
                     logger.warning(f"Relaxed alternatives search hit global timeout of {global_timeout}s")
                     break
                 
@@ -4919,5 +4924,5 @@ class PriceScraper:
         # Sort by score
         alternatives.sort(key=lambda x: x.get("holistic_score", 0), reverse=True)
         
-        logger.info(f"Relaxed alternatives search completed in {time.time() - start_time:.2f}s. Found {len(alternatives)} alternatives.")
+        logger.info(f"Relaxed alternatives search completed in {time.monotonic() - start_time:.2f}s. Found {len(alternatives)} alternatives.")
         return alternatives[:max_results]
@@ -14,6 +14,9 @@ from .simple_scraper import SimpleScraper
 
 logger = logging.getLogger(__name__)
 
+# Every Amazon product URL form, in one pass (/gp/product/ is covered by /product/)
+_ASIN_RE = re.compile(r'/(?:dp|ASIN|product)/([A-Z0-9]{10})')
+
 class MinimalStealthScraper:
     """
     Minimal implementation of StealthScraper for Amazon products.
@@ -105,19 +108,8 @@ class MinimalStealthScraper:
     
     def _extract_asin_from_url(self, url: str) -> Optional[str]:
         """Extract ASIN from Amazon URL."""
-        patterns = [
-            r'/dp/([A-Z0-9]{10})/?',
-            r'/gp/product/([A-Z0-9]{10})/?',
-            r'/ASIN/([A-Z0-9]{10})/?',
-            r'/product/([A-Z0-9]{10})/?'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
-        
-        return None
+        match = _ASIN_RE.search(url)
+        return match.group(1) if match else None
     
     def _extract_title_from_url(self, url: str) -> str:
         """Extract a reasonable product title from the URL."""